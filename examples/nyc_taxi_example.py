@@ -46,9 +46,9 @@ xlabels = {'day_time':'time of the day',
 basedir = "../_data/in/nyc_taxi/"
 outdir = "../_data/out/"
 datatype = 'test'#'train'
-datafile = "{0}_norm_data.csv".format(datatype)
+datafile = "{0}_norm_data.parquet".format(datatype)
 
-data_df = pd.read_csv(basedir+datafile)
+data_df = pd.read_parquet(basedir+datafile)
 
 params = [
     #{'dataset':'day_time', 'period':24, 'scale':True, 'n_clusters':[4,7,12]},
@@ -1,2 +1,54 @@
-from .periodic_kmeans import PeriodicKMeans
-from .periodic_average import periodic_average_1d, periodic_average_2d
\ No newline at end of file
+# modules with heavy imports (pyclustering, JAX, multiprocessing, asyncio) are loaded on the first access to their names
+import importlib
+
+from .periodic_average import periodic_average_1d, periodic_average_2d, periodic_average_segments
+from .batch import batch_periodic_kmeans
+from .bisecting import BisectingPeriodicKMeans
+from .coreset import periodic_coreset, PeriodicCoresetStream
+from .features import periodic_phases, extract_periodic_features
+from .initialization import periodic_kmeans_plusplus
+from .mixture import PeriodicGaussianMixture
+from .metrics import periodic_silhouette_score, periodic_davies_bouldin_score, periodic_calinski_harabasz_score
+from .model_selection import select_no_of_clusters
+from .periodic_distance import periodic_difference, periodic_distance_square, nearest_centers, circular_distance_sums
+from .parallel import parallel_periodic_distance_square, resolve_n_threads
+from .periodic_median import periodic_median_1d, periodic_median_2d
+from .periodic_kmedoids import PeriodicKMedoids
+from .predictor import PeriodicKMeansPredictor
+from .reproducible import reproducible_sum
+from .scoring import PrunedNearestCenters
+
+
+_LAZY_ATTRIBUTES = {
+    "PeriodicKMeans": ".periodic_kmeans",
+    "PeriodicKMedians": ".periodic_kmedians",
+    "DistributedPeriodicKMeans": ".distributed",
+    "PeriodicShard": ".distributed",
+    "InProcessBackend": ".distributed",
+    "LocalBackend": ".distributed",
+    "MicroBatchingPredictor": ".serving",
+}
+
+__all__ = [
+    "periodic_average_1d", "periodic_average_2d", "periodic_average_segments",
+    "batch_periodic_kmeans", "BisectingPeriodicKMeans", "periodic_coreset", "PeriodicCoresetStream",
+    "periodic_phases", "extract_periodic_features", "periodic_kmeans_plusplus",
+    "PeriodicGaussianMixture", "periodic_silhouette_score", "periodic_davies_bouldin_score",
+    "periodic_calinski_harabasz_score", "select_no_of_clusters", "periodic_difference",
+    "periodic_distance_square", "nearest_centers", "circular_distance_sums",
+    "parallel_periodic_distance_square", "resolve_n_threads", "periodic_median_1d",
+    "periodic_median_2d", "PeriodicKMedoids", "PeriodicKMeansPredictor", "reproducible_sum",
+    "PrunedNearestCenters", *_LAZY_ATTRIBUTES,
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value # cache, so that __getattr__ is not called again for this name
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,95 @@
+import numpy as np
+
+from .periodic_average import periodic_average_segments
+from .periodic_distance import periodic_distance_square
+
+
+def _group_layout(group_index: np.ndarray[int], n_groups: int):
+    # points ordered by group, together with the start and the size of each group in that order
+    order = np.argsort(group_index, kind = "stable")
+    counts = np.bincount(group_index, minlength = n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return order, starts, counts
+
+
+def _batch_assign(values: np.ndarray[float], group_index: np.ndarray[int], centers: np.ndarray[float], period: np.ndarray[float]):
+    # closest center of the own group for each point, looping over the (few) clusters keeps the memory proportional to the number of points
+    labels = np.zeros(len(values), dtype = np.intp)
+    distances = periodic_distance_square(values, centers[group_index, 0], period)
+    for index_cluster in range(1, centers.shape[1]):
+        candidate_distances = periodic_distance_square(values, centers[group_index, index_cluster], period)
+        closer = candidate_distances < distances
+        labels[closer] = index_cluster
+        distances[closer] = candidate_distances[closer]
+    return labels, distances
+
+
+def _batch_kmeans_plusplus(values: np.ndarray[float], group_index: np.ndarray[int], n_groups: int, no_of_clusters: int, period: np.ndarray[float], rng: np.random.Generator):
+    # k-means++ seeding of all groups simultaneously, each step draws one point per group with probability proportional to its square distance to the closest center chosen so far
+    order, starts, counts = _group_layout(group_index, n_groups)
+    ends = starts + counts - 1
+    centers = np.empty((n_groups, no_of_clusters, values.shape[1]))
+    chosen = order[starts + np.floor(rng.random(n_groups) * counts).astype(np.intp)] # the first center is drawn uniformly
+    centers[:, 0] = values[chosen]
+    min_distances = periodic_distance_square(values, centers[group_index, 0], period)
+    for index_cluster in range(1, no_of_clusters):
+        cumulative = np.cumsum(min_distances[order])
+        before = np.concatenate(([0], cumulative))[starts] # cumulative sum before each group
+        totals = np.concatenate(([0], cumulative))[ends + 1] - before
+        positions = np.searchsorted(cumulative, before + rng.random(n_groups) * totals, side = "right")
+        chosen = order[np.clip(positions, starts, ends)] # clipping also covers groups where all points coincide with the centers
+        centers[:, index_cluster] = values[chosen]
+        np.minimum(min_distances, periodic_distance_square(values, centers[group_index, index_cluster], period), out = min_distances)
+    return centers
+
+
+def batch_periodic_kmeans(values: np.ndarray[float], groups: np.ndarray, no_of_clusters: int, period: float | np.ndarray[float] = 1, initial_centers: np.ndarray[float] | None = None, tolerance: float = 0.001, itermax: int = 100, random_state = None):
+    """!
+    @brief Cluster many independent groups of periodic data in one call.
+
+    @details All groups are seeded with k-means++ and iterated together: the assignment is vectorized over all points and the periodic averages of all (group, cluster) pairs are computed at once by periodic_average_segments. A cluster that becomes empty keeps its previous center. Iterations stop when the largest square change of a center in any group does not exceed tolerance.
+
+    @param[in] values (array_like): Data of shape (N,) or (N, D).
+    @param[in] groups (array_like): Group id of each point, of length N.
+    @param[in] no_of_clusters (uint): Number of clusters in each group.
+    @param[in] period (float or array_like): Period, common or per dimension.
+    @param[in] initial_centers (array_like): Optional initial centers of shape (G, no_of_clusters, D), ordered as the sorted unique group ids.
+    @param[in] tolerance (double): Stop condition for the square change of the centers.
+    @param[in] itermax (uint): Maximum number of iterations.
+    @param[in] random_state (int): Seed for the k-means++ initialization.
+
+    @return (numpy.array, numpy.array, numpy.array) Sorted unique group ids (G,), centers (G, no_of_clusters, D) and the cluster index of each point within its group (N,).
+
+    """
+    values = np.asarray(values, dtype = np.float64)
+    if values.ndim == 1: values = values[:, None]
+    if values.ndim != 2: raise ValueError("values must be a one- or two-dimensional array")
+    groups = np.asarray(groups)
+    if groups.shape != values.shape[:1]: raise ValueError("groups must have the same length as values")
+    if no_of_clusters <= 0: raise ValueError("no_of_clusters must be positive")
+
+    period = np.broadcast_to(np.asarray(period, dtype = np.float64), values.shape[1:])
+    values = values % period
+    keys, group_index = np.unique(groups, return_inverse = True)
+    group_index = group_index.reshape(-1)
+    n_groups = len(keys)
+    if n_groups == 0: return keys, np.empty((0, no_of_clusters, values.shape[1])), np.empty(0, dtype = np.intp) # no points, no groups
+
+    if initial_centers is None: centers = _batch_kmeans_plusplus(values, group_index, n_groups, no_of_clusters, period, np.random.default_rng(random_state))
+    else:
+        centers = np.array(initial_centers, dtype = np.float64)
+        if centers.shape != (n_groups, no_of_clusters, values.shape[1]): raise ValueError("initial_centers must have shape (number of groups, no_of_clusters, dimension)")
+
+    for _ in range(itermax):
+        labels, _ = _batch_assign(values, group_index, centers, period)
+        segments = group_index * no_of_clusters + labels
+        updated_centers = centers.copy()
+        for dimension in range(values.shape[1]):
+            averages = periodic_average_segments(values[:, dimension], segments, n_groups * no_of_clusters, period = period[dimension]).reshape(n_groups, no_of_clusters)
+            updated_centers[..., dimension] = np.where(np.isnan(averages), centers[..., dimension], averages) # empty clusters keep their centers
+        maximum_change = np.max(periodic_distance_square(centers, updated_centers, period))
+        centers = updated_centers
+        if maximum_change <= tolerance: break
+
+    labels, _ = _batch_assign(values, group_index, centers, period)
+    return keys, centers, labels
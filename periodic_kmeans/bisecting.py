@@ -0,0 +1,145 @@
+import heapq
+
+import numpy as np
+
+from .initialization import periodic_kmeans_plusplus
+from .periodic_average import METHODS, periodic_average_2d
+from .periodic_distance import periodic_distance_square
+
+
+class BisectingPeriodicKMeans:
+    """!
+    @brief Hierarchical periodic k-means for a large number of clusters, splitting clusters in two until there are no_of_clusters of them.
+
+    @details The cluster with the largest within-cluster sum of squares is split by 2-means on its own points, so the cost of a split is proportional to the size of the split cluster, not to N k as in a PeriodicKMeans iteration. predict() descends the tree, choosing the closer child center at each node, and returns the clusters of the training points.
+
+    """
+
+    def __init__(self, data, period = 1, no_of_clusters = 2, tolerance = 0.001, itermax = 20, method = "exact", random_state = None):
+        """!
+        @param[in] data (array_like): Data of shape (N, D).
+        @param[in] period (float or array_like): Period, common or per dimension.
+        @param[in] no_of_clusters (uint): Number of leaves of the tree, fewer if clusters of identical points cannot be split further.
+        @param[in] tolerance (double): Stop condition of each 2-means for the square change of the centers, as in PeriodicKMeans.
+        @param[in] itermax (uint): Maximum number of iterations of each 2-means.
+        @param[in] method (str): Periodic average of the center updates, see periodic_average_1d.
+        @param[in] random_state (int): Seed for the k-means++ seeding of the splits.
+
+        """
+        self.__pointer_data = np.asarray(data, dtype = np.float64)
+        if self.__pointer_data.ndim != 2: raise ValueError("data must be a two-dimensional array")
+        if len(self.__pointer_data) == 0: raise ValueError("Input data is empty")
+        if no_of_clusters <= 0: raise ValueError("no_of_clusters must be positive")
+        if method not in METHODS: raise ValueError(f"method must be one of {METHODS}")
+        self.period = np.broadcast_to(np.asarray(period, dtype = np.float64), self.__pointer_data.shape[1:])
+        self.__no_of_clusters = no_of_clusters
+        self.__tolerance = tolerance
+        self.__itermax = itermax
+        self.__method = method
+        self.__rng = np.random.default_rng(random_state)
+        self.__node_centers = np.empty((0, self.__pointer_data.shape[1]))
+        self.__children = np.empty((0, 2), dtype = np.intp) # -1 for the leaves
+        self.__leaf_labels = np.empty(0, dtype = np.intp) # cluster of each leaf, -1 for the inner nodes
+        self.__labels = np.empty(0, dtype = np.intp)
+        self.__total_wce = 0.0
+
+
+    def __bisect(self, indices):
+        # 2-means of the points with the given indices, returns the two centers and the mask of the points of the second one, or None if the points cannot be split
+        points = self.__pointer_data[indices]
+        centers = periodic_kmeans_plusplus(points, 2, self.period, random_state = self.__rng)
+        for _ in range(self.__itermax):
+            second = periodic_distance_square(points, centers[1], self.period) < periodic_distance_square(points, centers[0], self.period)
+            if second.all() or not second.any(): return None # all points coincide with one of the centers
+            updated_centers = np.array([periodic_average_2d(points[~second], period = self.period, method = self.__method), periodic_average_2d(points[second], period = self.period, method = self.__method)])
+            maximum_change = np.max(periodic_distance_square(centers, updated_centers, self.period))
+            centers = updated_centers
+            if maximum_change <= self.__tolerance: break
+        distances = [periodic_distance_square(points, center, self.period) for center in centers]
+        second = distances[1] < distances[0] # final assignment, the rule used by predict()
+        if second.all() or not second.any(): return None
+        return centers, second, float(distances[0][~second].sum()), float(distances[1][second].sum())
+
+
+    def process(self):
+        """!
+        @brief Build the tree by splitting the cluster with the largest sum of squares until there are no_of_clusters leaves.
+
+        @return (BisectingPeriodicKMeans) Returns itself.
+
+        """
+        all_indices = np.arange(len(self.__pointer_data))
+        root_center = periodic_average_2d(self.__pointer_data, period = self.period, method = self.__method)
+        node_centers, children, members = [root_center], [[-1, -1]], {0: all_indices}
+        wce = {0: float(periodic_distance_square(self.__pointer_data, root_center, self.period).sum())}
+        heap = [(-wce[0], 0)] # leaves that may still be split, by decreasing sum of squares
+        n_leaves = 1
+        while n_leaves < self.__no_of_clusters and heap:
+            _, node = heapq.heappop(heap)
+            if wce[node] <= 0 or (split := self.__bisect(members[node])) is None: continue # identical points, the node stays a leaf
+            centers, second, first_wce, second_wce = split
+            for side, (indices, child_wce) in enumerate(((members[node][~second], first_wce), (members[node][second], second_wce))):
+                child = len(node_centers)
+                node_centers.append(centers[side])
+                children.append([-1, -1])
+                children[node][side] = child
+                members[child], wce[child] = indices, child_wce
+                heapq.heappush(heap, (-child_wce, child))
+            del members[node], wce[node] # only the leaves keep their points
+            n_leaves += 1
+
+        self.__node_centers = np.array(node_centers)
+        self.__children = np.array(children, dtype = np.intp)
+        leaves = np.flatnonzero(self.__children[:, 0] < 0)
+        self.__leaf_labels = np.full(len(node_centers), -1, dtype = np.intp)
+        self.__leaf_labels[leaves] = np.arange(len(leaves))
+        self.__labels = np.empty(len(self.__pointer_data), dtype = np.intp)
+        for leaf in leaves: self.__labels[members[leaf]] = self.__leaf_labels[leaf]
+        self.__total_wce = float(sum(wce[leaf] for leaf in leaves))
+        return self
+
+
+    def predict(self, points):
+        """!
+        @brief Calculates the cluster of each point by descending the tree.
+
+        @param[in] points (array_like): Points of shape (n, D).
+
+        @return (numpy.array) Index of the cluster (leaf) reached by each point.
+
+        """
+        if len(self.__children) == 0: return np.empty(0, dtype = np.intp)
+        points = np.asarray(points, dtype = np.float64)
+        nodes = np.zeros(len(points), dtype = np.intp)
+        active = np.flatnonzero(self.__children[nodes, 0] >= 0)
+        while len(active): # one level of the tree per pass, for all the points that have not reached a leaf
+            first, second = self.__children[nodes[active]].T
+            closer_second = periodic_distance_square(points[active], self.__node_centers[second], self.period) < periodic_distance_square(points[active], self.__node_centers[first], self.period)
+            nodes[active] = np.where(closer_second, second, first)
+            active = active[self.__children[nodes[active], 0] >= 0]
+        return self.__leaf_labels[nodes]
+
+
+    def get_centers(self):
+        return self.__node_centers[self.__leaf_labels >= 0].tolist()
+
+
+    def get_clusters(self):
+        order = np.argsort(self.__labels, kind = "stable")
+        return [cluster.tolist() for cluster in np.split(order, np.cumsum(np.bincount(self.__labels, minlength = len(self.get_centers())))[:-1])]
+
+
+    def get_labels(self):
+        return self.__labels.copy()
+
+
+    def get_total_wce(self):
+        return self.__total_wce
+
+
+    def get_tree(self):
+        """!
+        @brief The tree of the splits: the centers of all nodes (the root first), the two children of each node (-1 for the leaves) and the cluster of each leaf (-1 for the inner nodes).
+
+        """
+        return self.__node_centers.copy(), self.__children.copy(), self.__leaf_labels.copy()
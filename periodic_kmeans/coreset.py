@@ -0,0 +1,112 @@
+import numpy as np
+
+from .initialization import periodic_kmeans_plusplus
+from .periodic_distance import nearest_centers
+
+
+def periodic_coreset(data: np.ndarray[float], no_of_clusters: int, coreset_size: int, period: float | np.ndarray[float] = 1, weights: np.ndarray[float] | None = None, random_state = None):
+    """!
+    @brief Build a weighted coreset of periodic data for k-means by sensitivity sampling.
+
+    @details Points are sampled with probability proportional to their weight times their sensitivity with respect to a periodic k-means++ seeding (the bound of Bachem, Lucic and Krause 2018), and weighted by the inverse of that probability, rescaled to the total weight, so that the weighted cost of any centers estimates the full cost.
+
+    @param[in] data (array_like): Data of shape (N, D).
+    @param[in] no_of_clusters (uint): Number of clusters the coreset should be good for.
+    @param[in] coreset_size (uint): Number of draws, the coreset has at most this many points.
+    @param[in] period (float or array_like): Period, common or per dimension.
+    @param[in] weights (array_like): Optional non-negative weights of the points, e.g. of a coreset being reduced further.
+    @param[in] random_state (int or numpy.random.Generator): Seed or generator for the seeding and the sampling.
+
+    @return (numpy.array, numpy.array) Coreset points and their weights, to be passed to PeriodicKMeans(points, weights = weights).
+
+    """
+    data = np.asarray(data, dtype = np.float64)
+    if data.ndim != 2: raise ValueError("data must be a two-dimensional array")
+    weights = np.ones(len(data)) if weights is None else np.asarray(weights, dtype = np.float64)
+    if weights.shape != data.shape[:1]: raise ValueError("weights must have the same length as data")
+    if coreset_size <= 0: raise ValueError("coreset_size must be positive")
+    rng = np.random.default_rng(random_state)
+
+    centers = periodic_kmeans_plusplus(data, min(no_of_clusters, len(data)), period, weights = weights, random_state = rng)
+    labels, distances = nearest_centers(data, centers, period)
+    total_weight = weights.sum()
+    cluster_weights = np.bincount(labels, weights = weights, minlength = len(centers))[labels]
+    total_cost = np.sum(weights * distances)
+    if total_cost > 0:
+        alpha = 16 * (np.log(len(centers)) + 2)
+        average_cost = total_cost / total_weight
+        cluster_costs = np.bincount(labels, weights = weights * distances, minlength = len(centers))[labels]
+        sensitivities = alpha * distances / average_cost + 2 * alpha * cluster_costs / (cluster_weights * average_cost) + 4 * total_weight / cluster_weights
+    else: sensitivities = total_weight / np.maximum(cluster_weights, np.finfo(np.float64).tiny) # all points coincide with the centers
+    probabilities = weights * sensitivities
+    probabilities /= probabilities.sum()
+
+    sample, counts = np.unique(rng.choice(len(data), size = coreset_size, p = probabilities), return_counts = True)
+    sample_weights = weights[sample] * counts / (coreset_size * probabilities[sample])
+    return data[sample], sample_weights * (total_weight / sample_weights.sum()) # rescaled to the total weight, which the sampled weights only match on average
+
+
+class PeriodicCoresetStream:
+    """!
+    @brief Build a periodic k-means coreset of a stream of chunks by merge-and-reduce.
+
+    @details Each chunk is reduced to a coreset, and two coresets of the same level are merged and reduced into one of the next level, so only O(log(number of chunks)) coresets are held at any time. Independent streams can be combined with merge().
+
+    """
+
+    def __init__(self, no_of_clusters, coreset_size, period = 1, random_state = None):
+        self.no_of_clusters = no_of_clusters
+        self.coreset_size = coreset_size
+        self.period = period
+        self.__rng = np.random.default_rng(random_state)
+        self.__levels = {} # level -> (points, weights)
+
+
+    def __reduce(self, points, weights):
+        if len(points) <= self.coreset_size: return points, weights # already small enough
+        return periodic_coreset(points, self.no_of_clusters, self.coreset_size, self.period, weights = weights, random_state = self.__rng)
+
+
+    def __insert(self, points, weights, level = 0):
+        while level in self.__levels:
+            other_points, other_weights = self.__levels.pop(level)
+            points, weights = self.__reduce(np.concatenate((other_points, points)), np.concatenate((other_weights, weights)))
+            level += 1
+        self.__levels[level] = (points, weights)
+
+
+    def add(self, chunk, weights = None):
+        """!
+        @brief Add a chunk of data of shape (n, D), with optional weights of its points.
+
+        """
+        chunk = np.asarray(chunk, dtype = np.float64)
+        if chunk.ndim != 2: raise ValueError("chunk must be a two-dimensional array")
+        if len(chunk) == 0: return
+        weights = np.ones(len(chunk)) if weights is None else np.asarray(weights, dtype = np.float64)
+        if weights.shape != chunk.shape[:1]: raise ValueError("weights must have the same length as chunk")
+        self.__insert(*self.__reduce(chunk, weights))
+
+
+    def merge(self, other):
+        """!
+        @brief Add all the coresets held by another stream built with the same parameters.
+
+        """
+        for level, (points, weights) in sorted(other._PeriodicCoresetStream__levels.items()):
+            self.__insert(points, weights, level)
+
+
+    def get_coreset(self, reduce = True):
+        """!
+        @brief Return the coreset of all the data added so far.
+
+        @param[in] reduce (boolean): Reduce the union of the coresets of all levels to at most coreset_size points.
+
+        @return (numpy.array, numpy.array) Coreset points and their weights.
+
+        """
+        if not self.__levels: raise ValueError("No data has been added")
+        points = np.concatenate([points for points, _ in self.__levels.values()])
+        weights = np.concatenate([weights for _, weights in self.__levels.values()])
+        return self.__reduce(points, weights) if reduce else (points, weights)
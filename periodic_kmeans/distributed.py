@@ -0,0 +1,369 @@
+import itertools
+import multiprocessing
+from fractions import Fraction
+
+import numpy as np
+
+from .initialization import periodic_kmeans_plusplus
+from .parallel import parallel_periodic_distance_square
+from .periodic_distance import nearest_centers, periodic_distance_square
+from .predictor import PeriodicKMeansPredictor
+from .reproducible import exact_best_average, exact_sum, exact_sums, screening_margin, to_float, to_fraction
+
+
+class PeriodicShard:
+    """!
+    @brief Worker-side state of a distributed fit: one shard of the data and its assignment to the current centers.
+
+    @details Backends call the methods below by name on every shard and return the replies to the driver. All replies have a size independent of the number of points: the assignment returns per-cluster counts, and the center update is answered by histograms of the wrapped coordinates of each cluster, kept sorted between the calls of one iteration.
+
+    """
+
+    def __init__(self, data, n_threads = 1, chunk_size = 65536):
+        """!
+        @param[in] data (array_like or str): Data of shape (N, D), or the path of a .npy file, which is memory-mapped.
+        @param[in] n_threads (uint): Threads for the distances, as in PeriodicKMeans.
+        @param[in] chunk_size (uint): Number of points whose distances to the centers are held at once.
+
+        """
+        self.data = np.load(data, mmap_mode = "r") if isinstance(data, str) else np.asarray(data, dtype = np.float64)
+        if self.data.ndim != 2: raise ValueError("data must be a two-dimensional array")
+        self.n_threads = n_threads
+        self.chunk_size = chunk_size
+        self.__labels = np.empty(0, dtype = np.intp)
+        self.__sorted = [] # per dimension, the wrapped coordinates sorted by cluster, then by value
+        self.__starts = np.zeros(1, dtype = np.intp) # start of each cluster in the sorted coordinates
+
+
+    def seed(self, no_of_clusters, period, random_state = None):
+        """!
+        @brief Periodic k-means++ centers of the shard, with the number of shard points closest to each of them.
+
+        """
+        if len(self.data) == 0: return np.empty((0, self.data.shape[1])), np.empty(0)
+        centers = periodic_kmeans_plusplus(self.data, min(no_of_clusters, len(self.data)), period, random_state = random_state)
+        labels, _ = nearest_centers(self.data, centers, period, chunk_size = self.chunk_size)
+        return centers, np.bincount(labels, minlength = len(centers)).astype(np.float64)
+
+
+    def assign(self, centers, period):
+        """!
+        @brief Assign each point to the closest center and sort the wrapped coordinates of each cluster.
+
+        @return (numpy.array) Number of shard points in each cluster.
+
+        """
+        self.__labels = np.empty(len(self.data), dtype = np.intp)
+        for start in range(0, len(self.data), self.chunk_size):
+            distances = parallel_periodic_distance_square(centers, self.data[start:start + self.chunk_size], period, n_threads = self.n_threads) # the kernel of PeriodicKMeans, so that ties are broken alike
+            self.__labels[start:start + self.chunk_size] = np.argmin(distances, axis = 0)
+        counts = np.bincount(self.__labels, minlength = len(centers))
+        self.__starts = np.concatenate(([0], np.cumsum(counts)))
+        by_cluster = np.argsort(self.__labels.astype(np.min_scalar_type(max(len(centers) - 1, 0))), kind = "stable")
+        period = np.broadcast_to(period, self.data.shape[1:])
+        self.__sorted = []
+        for dimension in range(self.data.shape[1]):
+            values = self.data[by_cluster, dimension] % period[dimension]
+            for index_cluster in range(len(centers)):
+                values[self.__starts[index_cluster]:self.__starts[index_cluster + 1]].sort()
+            self.__sorted.append(values)
+        return counts
+
+
+    def histograms(self, queries, n_bins, reproducible = False):
+        """!
+        @brief Histograms of the wrapped coordinates of clusters within closed intervals.
+
+        @param[in] queries (list): Tuples (cluster, dimension, low, high) with low < high.
+        @param[in] n_bins (uint): Number of equal-width bins of each interval.
+        @param[in] reproducible (boolean): Also return the exact sums of the bins, see exact_sums.
+
+        @return (tuple) Count, sum, minimum and maximum of the values in each bin, arrays of shape (len(queries), n_bins), with +inf and -inf as the extrema of empty bins, followed if reproducible by the lists of the exact sums of the bins of each query.
+
+        """
+        counts = np.zeros((len(queries), n_bins))
+        sums = np.zeros((len(queries), n_bins))
+        minima = np.full((len(queries), n_bins), np.inf)
+        maxima = np.full((len(queries), n_bins), -np.inf)
+        exact_bin_sums = [[0] * n_bins for _ in queries]
+        for index_query, (index_cluster, dimension, low, high) in enumerate(queries):
+            values = self.__sorted[dimension][self.__starts[index_cluster]:self.__starts[index_cluster + 1]]
+            values = values[np.searchsorted(values, low, side = "left"):np.searchsorted(values, high, side = "right")]
+            if len(values) == 0: continue
+            bins = np.minimum(np.floor((values - low) / (high - low) * n_bins).astype(np.intp), n_bins - 1) # nondecreasing in the value, so every bin holds a contiguous run of the sorted values
+            counts[index_query] = np.bincount(bins, minlength = n_bins)
+            sums[index_query] = np.bincount(bins, weights = values, minlength = n_bins)
+            occupied = np.flatnonzero(counts[index_query])
+            minima[index_query, occupied] = values[np.searchsorted(bins, occupied, side = "left")]
+            maxima[index_query, occupied] = values[np.searchsorted(bins, occupied, side = "right") - 1]
+            if reproducible: exact_bin_sums[index_query] = exact_sums(values, bins, n_bins)
+        return (counts, sums, minima, maxima, exact_bin_sums) if reproducible else (counts, sums, minima, maxima)
+
+
+    def total_wce(self, centers, period, reproducible = False):
+        """!
+        @brief Sum of the square distances of the shard points to the centers of the clusters they were last assigned to, exact (see exact_sums) if reproducible.
+
+        """
+        distances = np.empty(len(self.data))
+        for start in range(0, len(self.data), self.chunk_size):
+            chunk_distances = parallel_periodic_distance_square(centers, self.data[start:start + self.chunk_size], period, n_threads = self.n_threads) # the evaluation of the assignment
+            distances[start:start + self.chunk_size] = np.take_along_axis(chunk_distances, self.__labels[None, start:start + self.chunk_size], axis = 0)[0]
+        return exact_sum(distances) if reproducible else float(np.sum(distances))
+
+
+class InProcessBackend:
+    """!
+    @brief Backend holding all the shards in the calling process, mainly a reference for custom backends.
+
+    @details A backend only has to provide map(method, *args), which calls the named PeriodicShard method with the same arguments on every shard and returns the list of the replies in the order of the shards. Over MPI or sockets this is one broadcast followed by one gather per call.
+
+    """
+
+    def __init__(self, shards, n_threads = 1):
+        self.shards = [PeriodicShard(shard, n_threads = n_threads) for shard in shards]
+
+
+    def map(self, method, *args):
+        return [getattr(shard, method)(*args) for shard in self.shards]
+
+
+    def close(self):
+        self.shards = []
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _serve(connection, shard, n_threads):
+    # worker process of LocalBackend: call the requested shard methods until None is received
+    shard = PeriodicShard(shard, n_threads = n_threads)
+    while (message := connection.recv()) is not None:
+        method, args = message
+        try:
+            connection.send((True, getattr(shard, method)(*args)))
+        except Exception as error:
+            connection.send((False, error))
+    connection.close()
+
+
+class LocalBackend:
+    """!
+    @brief Backend running each shard in its own local process, connected to the driver by a multiprocessing pipe.
+
+    @details Stands in for a cluster of machines: the shards are sent to the workers once (or loaded there when given as .npy paths), after which only the requests and the O(k D) replies of the shards go through the pipes.
+
+    """
+
+    def __init__(self, shards, n_threads = 1, start_method = None):
+        """!
+        @param[in] shards (list): Arrays of shape (N_i, D), or paths of .npy files loaded by the workers.
+        @param[in] n_threads (uint): Threads used by each worker.
+        @param[in] start_method (str): Optional multiprocessing start method, e.g. "spawn".
+
+        """
+        context = multiprocessing.get_context(start_method)
+        self.__connections = []
+        self.__processes = []
+        for shard in shards:
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target = _serve, args = (worker_connection, shard, n_threads), daemon = True)
+            process.start()
+            worker_connection.close()
+            self.__connections.append(connection)
+            self.__processes.append(process)
+
+
+    def map(self, method, *args):
+        for connection in self.__connections: connection.send((method, args)) # all the workers start before any reply is awaited
+        replies = [connection.recv() for connection in self.__connections]
+        for succeeded, reply in replies:
+            if not succeeded: raise reply
+        return [reply for _, reply in replies]
+
+
+    def close(self):
+        for connection in self.__connections:
+            connection.send(None)
+            connection.close()
+        for process in self.__processes: process.join()
+        self.__connections, self.__processes = [], []
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DistributedPeriodicKMeans:
+    """!
+    @brief Periodic k-means over data partitioned into shards, driven through a pluggable backend.
+
+    @details Each iteration exchanges per-cluster counts and histograms of the wrapped coordinates instead of points. The bins that could hide a better threshold of the periodic average are histogrammed again in the next round, so with the same initial centers the result is that of PeriodicKMeans on all the data up to the rounding of the sums, and bitwise that of PeriodicKMeans(reproducible = True) if reproducible.
+
+    """
+
+    def __init__(self, backend, period = 1, initial_centers = None, no_of_clusters = None, random_state = None, tolerance = 0.001, itermax = 100, n_bins = 64, reproducible = False):
+        """!
+        @param[in] backend (object): Backend providing map(method, *args) over the shards, e.g. LocalBackend.
+        @param[in] period (float or array_like): Period, common or per dimension.
+        @param[in] initial_centers (array_like): Initial centers of shape (k, D); pass the same ones as to PeriodicKMeans to reproduce its result.
+        @param[in] no_of_clusters (uint): Number of clusters when initial_centers are not given, the centers are then chosen by weighted periodic k-means++ among the k-means++ centers of every shard.
+        @param[in] random_state (int): Seed for the initialization.
+        @param[in] tolerance (double): Stop condition for the square change of the centers, as in PeriodicKMeans.
+        @param[in] itermax (uint): Maximum number of iterations.
+        @param[in] n_bins (uint): Number of histogram bins per cluster and dimension in each round, at least 2.
+        @param[in] reproducible (boolean): Exact sums for the centers and the total wce, bitwise independent of the number of shards and threads.
+
+        """
+        if n_bins < 2: raise ValueError("n_bins must be at least 2")
+        self.backend = backend
+        self.period = period
+        self.__tolerance = tolerance
+        self.__itermax = itermax
+        self.__n_bins = n_bins
+        self.reproducible = reproducible
+        if initial_centers is None:
+            if no_of_clusters is None or no_of_clusters <= 0: raise ValueError("no_of_clusters must be positive when initial_centers are not given")
+            initial_centers = self.__seed(no_of_clusters, random_state)
+        self.__centers = np.array(initial_centers, dtype = np.float64)
+        if self.__centers.ndim != 2 or len(self.__centers) == 0: raise ValueError("initial_centers must be a non-empty two-dimensional array")
+        self.__counts = np.zeros(0)
+        self.__total_wce = 0.0
+
+
+    def __seed(self, no_of_clusters, random_state):
+        rng = np.random.default_rng(random_state)
+        seeds = self.backend.map("seed", no_of_clusters, self.period, rng.integers(2**32))
+        candidates = np.concatenate([centers for centers, _ in seeds])
+        weights = np.concatenate([weights for _, weights in seeds]) # shard points represented by each candidate
+        if len(candidates) < no_of_clusters: raise ValueError("no_of_clusters must not exceed the number of points")
+        return periodic_kmeans_plusplus(candidates, no_of_clusters, self.period, weights = weights, random_state = rng)
+
+
+    def __gather_histograms(self, queries):
+        replies = self.backend.map("histograms", queries, self.__n_bins, self.reproducible)
+        counts, sums, minima, maxima = (np.array(arrays) for arrays in list(zip(*replies))[:4])
+        if not self.reproducible: return counts.sum(axis = 0), sums.sum(axis = 0), minima.min(axis = 0), maxima.max(axis = 0)
+        exact_bin_sums = [[sum(shard_sums) for shard_sums in zip(*query_sums)] for query_sums in zip(*(reply[4] for reply in replies))] # Python integers, in the order of the queries
+        return counts.sum(axis = 0), np.array([[to_float(fixed) for fixed in query_sums] for query_sums in exact_bin_sums]).reshape(counts.shape[1:]), minima.min(axis = 0), maxima.max(axis = 0), exact_bin_sums
+
+
+    def __update_centers(self, kept, counts):
+        # exact periodic averages of the kept clusters, by rounds of histograms of the intervals that may hold the best threshold
+        dimension = self.__centers.shape[1]
+        period = np.broadcast_to(np.asarray(self.period, dtype = np.float64), (dimension,))
+        n = np.repeat(counts[kept], dimension) # one problem per (kept cluster, dimension), flattened
+        problem_period = np.tile(period, len(kept))
+        sums = np.zeros(len(n))
+        best_objective, best_shifted = np.full(len(n), np.inf), np.zeros(len(n))
+        margins = screening_margin(n, n, problem_period) if self.reproducible else np.zeros(len(n)) # thresholds closer than this to the best are compared exactly
+        exact_totals, candidates = [0] * len(n), [[] for _ in range(len(n))] # reproducible: exact sums, and the thresholds (objective, shifted, exact shifted sum) that may be the best
+
+        def objective(problems, shifted, shifted_sum):
+            # n times the variance after shifting the values below the threshold by a period, up to the constant sum of squares
+            p = problem_period[problems]
+            return 2 * p * shifted_sum + p**2 * shifted - (sums[problems] + p * shifted)**2 / n[problems]
+
+        problems = np.arange(len(n)) # first round: the whole [0, period] range, nothing below it
+        lows, highs = np.zeros(len(n)), problem_period.copy()
+        below, below_sum = np.zeros(len(n)), np.zeros(len(n))
+        below_exact = [0] * len(n)
+        first = True
+        while len(problems):
+            queries = [(int(kept[problem // dimension]), int(problem % dimension), float(low), float(high)) for problem, low, high in zip(problems, lows, highs)]
+            bin_counts, bin_sums, minima, maxima, *exact_bin_sums = self.__gather_histograms(queries)
+            if first and self.reproducible:
+                exact_totals = [sum(query_sums) for query_sums in exact_bin_sums[0]]
+                sums[problems] = [to_float(fixed) for fixed in exact_totals]
+            elif first: sums[problems] = bin_sums.sum(axis = 1)
+            first = False
+            shifted = below[:, None] + np.cumsum(bin_counts, axis = 1) # thresholds after each bin
+            shifted_sum = below_sum[:, None] + np.cumsum(bin_sums, axis = 1)
+            shifted, shifted_sum = np.hstack((below[:, None], shifted)), np.hstack((below_sum[:, None], shifted_sum)) # and before the first one
+            objectives = objective(problems[:, None], shifted, shifted_sum)
+            best_in_query = np.argmin(objectives, axis = 1)
+            for index_query, problem in enumerate(problems):
+                if objectives[index_query, best_in_query[index_query]] < best_objective[problem]:
+                    best_objective[problem] = objectives[index_query, best_in_query[index_query]]
+                    best_shifted[problem] = shifted[index_query, best_in_query[index_query]]
+            if self.reproducible: # exact sums at the thresholds that may be the best
+                exact_shifted_sums = [list(itertools.accumulate(query_sums, initial = prefix)) for prefix, query_sums in zip(below_exact, exact_bin_sums[0])]
+                for index_query, index_threshold in zip(*np.nonzero(objectives <= (best_objective + margins)[problems][:, None])):
+                    candidates[problems[index_query]].append((objectives[index_query, index_threshold], int(shifted[index_query, index_threshold]), exact_shifted_sums[index_query][index_threshold]))
+            # thresholds inside a bin shift its smallest values, each at least its minimum, and the objective is concave in their number
+            before, before_sum = shifted[:, :-1], shifted_sum[:, :-1]
+            lower_bounds = np.minimum(objectives[:, :-1], objective(problems[:, None], before + bin_counts, before_sum + bin_counts * np.where(bin_counts > 0, minima, 0)))
+            index_query, index_bin = np.nonzero((bin_counts > 1) & (minima < maxima) & (lower_bounds < (best_objective + margins)[problems][:, None]))
+            if self.reproducible: below_exact = [exact_shifted_sums[query][threshold] for query, threshold in zip(index_query, index_bin)]
+            problems, lows, highs = problems[index_query], minima[index_query, index_bin], maxima[index_query, index_bin]
+            below, below_sum = before[index_query, index_bin], before_sum[index_query, index_bin]
+        if self.reproducible:
+            return np.array([exact_best_average([(Fraction(shifted), to_fraction(shifted_sum)) for objective, shifted, shifted_sum in candidates[problem] if objective <= best_objective[problem] + margins[problem]], Fraction(int(n[problem])), to_fraction(exact_totals[problem]), problem_period[problem]) for problem in range(len(n))]).reshape(len(kept), dimension)
+        return (((sums + problem_period * best_shifted) / n) % problem_period).reshape(len(kept), dimension)
+
+
+    def process(self):
+        """!
+        @brief Performs cluster analysis on all the shards.
+
+        @return (DistributedPeriodicKMeans) Returns itself.
+
+        """
+        maximum_change = float("inf")
+        iteration = 0
+        while maximum_change > self.__tolerance and iteration < self.__itermax:
+            labels_centers = self.__centers
+            counts = np.sum(self.backend.map("assign", self.__centers, self.period), axis = 0)
+            kept = np.flatnonzero(counts) # empty clusters are dropped, as in PeriodicKMeans
+            updated_centers = self.__update_centers(kept, counts)
+            if len(updated_centers) != len(self.__centers): maximum_change = float("inf")
+            else: maximum_change = float(np.max(periodic_distance_square(self.__centers, updated_centers, self.period)))
+            self.__centers, self.__counts = updated_centers, counts[kept]
+            iteration += 1
+        if iteration > 0: # total within-cluster error of the last assignment with the final centers, indexed as the centers of that assignment
+            final_centers = np.zeros_like(labels_centers)
+            final_centers[kept] = self.__centers
+            total_wces = self.backend.map("total_wce", final_centers, self.period, self.reproducible)
+            self.__total_wce = to_float(sum(total_wces)) if self.reproducible else float(sum(total_wces))
+        return self
+
+
+    def predict(self, points):
+        """!
+        @brief Calculates the closest cluster to each point.
+
+        @param[in] points (array_like): Points for which closest clusters are calculated.
+
+        @return (numpy.array) Index of the closest cluster for each point.
+
+        """
+        return nearest_centers(points, self.__centers, self.period)[0]
+
+
+    def get_centers(self):
+        return self.__centers.tolist()
+
+
+    def get_cluster_sizes(self):
+        return self.__counts.astype(np.int64).tolist()
+
+
+    def get_total_wce(self):
+        return self.__total_wce
+
+
+    def save(self, file, dtype = None, index = None):
+        """!
+        @brief Save an inference-only artifact of the model, as PeriodicKMeans.save().
+
+        """
+        PeriodicKMeansPredictor.from_model(self, dtype = dtype, index = index).save(file)
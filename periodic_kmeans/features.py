@@ -0,0 +1,120 @@
+import numpy as np
+
+
+PHASES = ("day", "week", "month", "year")
+_DAY = np.timedelta64(86400 * 10**9, "ns")
+
+
+def _fraction_of_calendar_unit(timestamps: np.ndarray, unit: str):
+    # position within the enclosing calendar month or year, the unit lengths (28-31 days, 365 or 366 days) come from the calendar itself
+    start = timestamps.astype(f"datetime64[{unit}]")
+    start_ns, end_ns = start.astype("datetime64[ns]"), (start + 1).astype("datetime64[ns]")
+    return (timestamps - start_ns) / (end_ns - start_ns)
+
+
+def periodic_phases(timestamps, phases = ("day", "week")):
+    """!
+    @brief Convert timestamps to periodic phases in [0, 1), fully vectorized.
+
+    @details "day" is the time of the day, "week" the time of the week starting on Monday 00:00, "month" and "year" the time of the calendar month and year with their actual lengths (including leap years). Missing timestamps (NaT) give nan. Timezone-aware timestamps are converted to their local wall-clock time, as in iter_timestamp_chunks(), so that daily and weekly cycles follow the local clock. The result can be clustered directly with period 1, or scaled, e.g. the week phase by 7 to get days.
+
+    @param[in] timestamps (array_like): datetime64 values or ISO 8601 strings, e.g. a pandas datetime column.
+    @param[in] phases (tuple): Names of the phases to compute, a subset of PHASES in any order.
+
+    @return (numpy.array) Phases of shape (N, len(phases)).
+
+    """
+    if isinstance(phases, str): phases = (phases,)
+    if unknown := set(phases) - set(PHASES): raise ValueError(f"Unknown phases {sorted(unknown)}, must be among {PHASES}")
+    if hasattr(timestamps, "dt") and timestamps.dt.tz is not None: timestamps = timestamps.dt.tz_localize(None) # pandas, keep the local wall-clock time
+    timestamps = np.asarray(timestamps, dtype = "datetime64[ns]").reshape(-1)
+
+    days = timestamps.astype("datetime64[D]")
+    day_phase = (timestamps - days.astype("datetime64[ns]")) / _DAY
+    result = np.empty((len(timestamps), len(phases)))
+    for index, phase in enumerate(phases):
+        if phase == "day": result[:, index] = day_phase
+        elif phase == "week": result[:, index] = ((days.astype(np.int64) + 3) % 7 + day_phase) / 7 # 1970-01-01 was a Thursday, the fourth day of the week
+        elif phase == "month": result[:, index] = _fraction_of_calendar_unit(timestamps, "M")
+        else: result[:, index] = _fraction_of_calendar_unit(timestamps, "Y")
+    result[np.isnat(timestamps)] = np.nan
+    return result
+
+
+def _parquet():
+    try:
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError("Reading and writing Parquet files requires pyarrow") from error
+    return pyarrow.parquet
+
+
+def _number_of_rows(path: str):
+    if str(path).endswith(".npy"): return len(np.load(path, mmap_mode = "r"))
+    return _parquet().ParquetFile(path).metadata.num_rows
+
+
+def iter_timestamp_chunks(path: str, column: str | None = None, chunk_size: int = 1_000_000):
+    """!
+    @brief Read a timestamp column chunk by chunk from a Parquet file (reading only that column) or from a memory-mapped .npy file.
+
+    @param[in] path (str): Path to a .parquet or .npy file.
+    @param[in] column (str): Name of the column, required for Parquet.
+    @param[in] chunk_size (uint): Number of rows per chunk.
+
+    @return (generator) datetime64[ns] arrays of at most chunk_size rows, timezone-aware columns in local wall-clock time.
+
+    """
+    if str(path).endswith(".npy"):
+        timestamps = np.load(path, mmap_mode = "r")
+        for start in range(0, len(timestamps), chunk_size):
+            yield np.asarray(timestamps[start:start + chunk_size], dtype = "datetime64[ns]")
+        return
+
+    if column is None: raise ValueError("column is required for Parquet files")
+    parquet = _parquet()
+    import pyarrow.compute
+    for batch in parquet.ParquetFile(path).iter_batches(batch_size = chunk_size, columns = [column]):
+        timestamps = batch.column(0)
+        if getattr(timestamps.type, "tz", None) is not None: timestamps = pyarrow.compute.local_timestamp(timestamps) # stored in UTC, keep the local wall-clock time
+        yield np.asarray(timestamps.to_numpy(zero_copy_only = False), dtype = "datetime64[ns]")
+
+
+def extract_periodic_features(path: str, column: str | None = None, phases = ("day", "week"), output: str | None = None, chunk_size: int = 1_000_000):
+    """!
+    @brief Compute periodic phases of a timestamp column chunk by chunk, optionally writing them to a .npy or Parquet file.
+
+    @param[in] path (str): Path to a .parquet or .npy file with the timestamps.
+    @param[in] column (str): Name of the timestamp column, required for Parquet.
+    @param[in] phases (tuple): Names of the phases to compute, see periodic_phases().
+    @param[in] output (str): Optional path to a .npy file (written as a memory map and returned) or a .parquet file (one column per phase).
+    @param[in] chunk_size (uint): Number of rows per chunk.
+
+    @return (numpy.array) Phases of shape (N, len(phases)) that can be passed to PeriodicKMeans with period 1, memory-mapped when output is a .npy file; None when output is a Parquet file.
+
+    """
+    if isinstance(phases, str): phases = (phases,)
+    chunks = iter_timestamp_chunks(path, column = column, chunk_size = chunk_size)
+
+    if output is not None and not str(output).endswith(".npy"):
+        import pyarrow
+        writer = None
+        try:
+            for timestamps in chunks:
+                values = periodic_phases(timestamps, phases)
+                table = pyarrow.table({phase: values[:, index] for index, phase in enumerate(phases)})
+                if writer is None: writer = _parquet().ParquetWriter(output, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None: writer.close()
+        return None
+
+    n_rows = _number_of_rows(path)
+    if output is None: result = np.empty((n_rows, len(phases)))
+    else: result = np.lib.format.open_memmap(output, mode = "w+", dtype = np.float64, shape = (n_rows, len(phases)))
+    start = 0
+    for timestamps in chunks:
+        result[start:start + len(timestamps)] = periodic_phases(timestamps, phases)
+        start += len(timestamps)
+    if output is not None: result.flush()
+    return result
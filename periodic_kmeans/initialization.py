@@ -0,0 +1,49 @@
+import numpy as np
+
+from .periodic_distance import periodic_distance_square
+
+
+def periodic_kmeans_plusplus(data: np.ndarray[float], no_of_clusters: int, period: float | np.ndarray[float] = 1, weights: np.ndarray[float] | None = None, initial_centers: np.ndarray[float] | None = None, random_state = None):
+    """!
+    @brief Choose initial centers with (weighted) k-means++ seeding using the periodic distance.
+
+    @details Each new center is drawn with probability proportional to weight * square distance to the closest center chosen so far, one random number per center, so for a fixed random_state the centers chosen for k are a prefix of the centers chosen for k + 1.
+
+    @param[in] data (array_like): Data of shape (N, D).
+    @param[in] no_of_clusters (uint): Total number of centers to return.
+    @param[in] period (float or array_like): Period, common or per dimension.
+    @param[in] weights (array_like): Optional non-negative weights of the points.
+    @param[in] initial_centers (array_like): Optional centers to extend, they are returned first and the remaining centers are drawn against them.
+    @param[in] random_state (int or numpy.random.Generator): Seed or generator for the random draws.
+
+    @return (numpy.array) Centers of shape (no_of_clusters, D).
+
+    """
+    data = np.asarray(data)
+    if data.ndim != 2: raise ValueError("data must be a two-dimensional array")
+    if weights is None: weights = np.ones(len(data))
+    weights = np.asarray(weights, dtype = np.float64)
+    if weights.shape != data.shape[:1]: raise ValueError("weights must have the same length as data")
+    if np.any(weights < 0) or weights.sum() <= 0: raise ValueError("weights must not be negative and must have a positive sum")
+    rng = np.random.default_rng(random_state)
+
+    centers = np.empty((no_of_clusters, data.shape[1]))
+    if initial_centers is not None and len(initial_centers):
+        n_initial = len(initial_centers)
+        if n_initial > no_of_clusters: raise ValueError("initial_centers must not contain more than no_of_clusters centers")
+        centers[:n_initial] = initial_centers
+        min_distances = np.min([periodic_distance_square(data, center, period) for center in centers[:n_initial]], axis = 0)
+    else:
+        if no_of_clusters == 0: return centers
+        cumulative = np.cumsum(weights)
+        centers[0] = data[min(np.searchsorted(cumulative, rng.random() * cumulative[-1], side = "right"), len(data) - 1)]
+        n_initial = 1
+        min_distances = periodic_distance_square(data, centers[0], period)
+
+    for index_center in range(n_initial, no_of_clusters):
+        cumulative = np.cumsum(weights * min_distances)
+        if cumulative[-1] > 0: index_point = np.searchsorted(cumulative, rng.random() * cumulative[-1], side = "right")
+        else: index_point = np.searchsorted(np.cumsum(weights), rng.random() * weights.sum(), side = "right") # all points coincide with the centers, fall back to weights only
+        centers[index_center] = data[min(index_point, len(data) - 1)]
+        np.minimum(min_distances, periodic_distance_square(data, centers[index_center], period), out = min_distances)
+    return centers
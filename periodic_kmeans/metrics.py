@@ -0,0 +1,152 @@
+import numpy as np
+
+from .periodic_average import periodic_average_1d, periodic_average_segments
+from .periodic_distance import circular_distance_sums, periodic_distance_square
+
+
+def _sample(data: np.ndarray[float], labels: np.ndarray[int], sample_size: int | None, random_state):
+    if sample_size is None or sample_size >= len(data): return data, labels
+    indices = np.random.default_rng(random_state).choice(len(data), sample_size, replace = False)
+    return data[indices], labels[indices]
+
+
+def _encode_labels(data: np.ndarray[float], labels: np.ndarray[int]):
+    data, labels = np.asarray(data), np.asarray(labels)
+    if data.ndim != 2: raise ValueError("data must be a two-dimensional array")
+    if labels.shape != data.shape[:1]: raise ValueError("labels must have the same length as data")
+    _, labels = np.unique(labels, return_inverse = True)
+    labels = labels.reshape(-1)
+    counts = np.bincount(labels)
+    if not 2 <= len(counts) <= len(data) - 1: raise ValueError("Number of labels must be between 2 and the number of points - 1")
+    return data, labels, counts
+
+
+def periodic_silhouette_score(data: np.ndarray[float], labels: np.ndarray[int], period: float | np.ndarray[float] = 1, sample_size: int | None = None, chunk_size: int = 1024, random_state = None, method: str = "auto"):
+    """!
+    @brief Mean silhouette coefficient of a clustering with the periodic Euclidean distance.
+
+    @details The "pairwise" method computes distances for chunk_size points at a time, so the memory is proportional to chunk_size * N instead of N^2. The "sorted" method, only for one-dimensional data, is exact in O(k N log N) time and O(N) memory: the sums of distances from every point to each cluster are obtained from the sorted cluster values with prefix sums around the circle (see circular_distance_sums). With sample_size, the score is computed on a random subset of the points.
+
+    @param[in] data (array_like): Data of shape (N, D).
+    @param[in] labels (array_like): Cluster label of each point.
+    @param[in] period (float or array_like): Period, common or per dimension.
+    @param[in] sample_size (uint): Optional number of randomly chosen points to compute the score on.
+    @param[in] chunk_size (uint): Number of points whose distances to all the others are held at once.
+    @param[in] random_state (int): Seed for the sampling.
+    @param[in] method (str): "pairwise", "sorted" or "auto" (sorted for one-dimensional data, pairwise otherwise).
+
+    @return (double) Mean silhouette coefficient, in [-1, 1].
+
+    """
+    data, labels = np.asarray(data), np.asarray(labels)
+    if data.ndim != 2: raise ValueError("data must be a two-dimensional array")
+    if labels.shape != data.shape[:1]: raise ValueError("labels must have the same length as data")
+    if method not in ("auto", "pairwise", "sorted"): raise ValueError("method must be 'auto', 'pairwise' or 'sorted'")
+    if method == "sorted" and data.shape[1] != 1: raise ValueError("The sorted method requires one-dimensional data")
+    data, labels = _sample(data, labels, sample_size, random_state)
+    if method == "pairwise" or data.shape[1] != 1: return _periodic_silhouette_scores(data, [labels], period, chunk_size)[0]
+
+    data, labels, counts = _encode_labels(data, labels)
+    values, period = data[:, 0], float(np.asarray(period).reshape(-1)[0])
+    intra = np.zeros(len(values)) # sum of distances to the own cluster, then the mean
+    nearest = np.full(len(values), np.inf) # smallest mean distance to another cluster
+    for cluster in range(len(counts)):
+        distance_sums = circular_distance_sums(values, values[labels == cluster], period)
+        own = labels == cluster
+        intra[own] = distance_sums[own]
+        np.minimum(nearest, np.where(own, np.inf, distance_sums / counts[cluster]), out = nearest)
+    return _silhouette(intra, counts[labels], nearest)
+
+
+def _periodic_silhouette_scores(data: np.ndarray[float], labelings: list[np.ndarray[int]], period: float | np.ndarray[float] = 1, chunk_size: int = 1024):
+    # silhouette scores of several labelings of the same points, sharing the computation of the distances
+    encoded = []
+    for labels in labelings:
+        _, labels, counts = _encode_labels(data, labels)
+        encoded.append((labels, counts))
+
+    offsets = np.cumsum([0] + [len(counts) for _, counts in encoded])
+    membership = np.zeros((len(data), offsets[-1])) # one-hot cluster membership of all labelings side by side
+    for (labels, _), offset in zip(encoded, offsets):
+        membership[np.arange(len(data)), offset + labels] = 1
+    distance_sums = np.empty((len(data), offsets[-1]))
+    for start in range(0, len(data), chunk_size):
+        distances = np.sqrt(periodic_distance_square(data[start:start + chunk_size], data, period, simple = False))
+        distance_sums[start:start + chunk_size] = distances @ membership # sums of distances to the points of each cluster
+    return [_silhouette_from_distance_sums(distance_sums[:, offset:offset + len(counts)], labels, counts) for (labels, counts), offset in zip(encoded, offsets)]
+
+
+def _silhouette_from_distance_sums(distance_sums: np.ndarray[float], labels: np.ndarray[int], counts: np.ndarray[int]):
+    # distance_sums[i, c] is the sum of distances from point i to all the points of cluster c
+    own = np.arange(len(labels)), labels
+    mean_distances = distance_sums / counts
+    mean_distances[own] = np.inf
+    return _silhouette(distance_sums[own], counts[labels], mean_distances.min(axis = 1))
+
+
+def _silhouette(intra_sums: np.ndarray[float], own_counts: np.ndarray[int], nearest: np.ndarray[float]):
+    # mean silhouette from the sums of distances to the own cluster and the smallest mean distance to another cluster
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        intra = intra_sums / (own_counts - 1) # the point itself contributes zero distance
+        silhouettes = (nearest - intra) / np.maximum(intra, nearest)
+    silhouettes[own_counts == 1] = 0 # singleton clusters have zero silhouette by convention
+    return float(np.mean(np.nan_to_num(silhouettes)))
+
+
+def periodic_davies_bouldin_score(data: np.ndarray[float], labels: np.ndarray[int], period: float | np.ndarray[float] = 1, centers: np.ndarray[float] | None = None, chunk_size: int = 65536):
+    """!
+    @brief Davies-Bouldin index of a clustering with the periodic Euclidean distance (lower is better).
+
+    @param[in] data (array_like): Data of shape (N, D).
+    @param[in] labels (array_like): Cluster label of each point.
+    @param[in] period (float or array_like): Period, common or per dimension.
+    @param[in] centers (array_like): Optional centers of the clusters in the order of the sorted unique labels, periodic averages by default.
+    @param[in] chunk_size (uint): Number of points handled at once.
+
+    @return (double) Davies-Bouldin index.
+
+    """
+    data, labels, counts = _encode_labels(data, labels)
+    centers = _centers(data, labels, counts, period, centers)
+    scatter = np.zeros(len(counts)) # mean distance of the points of each cluster to its center
+    for start in range(0, len(data), chunk_size):
+        chunk_labels = labels[start:start + chunk_size]
+        scatter += np.bincount(chunk_labels, weights = np.sqrt(periodic_distance_square(data[start:start + chunk_size], centers[chunk_labels], period)), minlength = len(counts))
+    scatter /= counts
+    center_distances = np.sqrt(periodic_distance_square(centers, centers, period, simple = False))
+    center_distances[center_distances == 0] = np.inf # also excludes each cluster from the comparison with itself
+    return float(np.mean(np.max((scatter[:, None] + scatter[None, :]) / center_distances, axis = 1)))
+
+
+def periodic_calinski_harabasz_score(data: np.ndarray[float], labels: np.ndarray[int], period: float | np.ndarray[float] = 1, centers: np.ndarray[float] | None = None, chunk_size: int = 65536):
+    """!
+    @brief Calinski-Harabasz index of a clustering with the periodic Euclidean distance (higher is better).
+
+    @details The dispersions are measured around the periodic averages: of each cluster within it and of the whole data between the clusters.
+
+    @param[in] data (array_like): Data of shape (N, D).
+    @param[in] labels (array_like): Cluster label of each point.
+    @param[in] period (float or array_like): Period, common or per dimension.
+    @param[in] centers (array_like): Optional centers of the clusters in the order of the sorted unique labels, periodic averages by default.
+    @param[in] chunk_size (uint): Number of points handled at once.
+
+    @return (double) Calinski-Harabasz index.
+
+    """
+    data, labels, counts = _encode_labels(data, labels)
+    centers = _centers(data, labels, counts, period, centers)
+    period = np.broadcast_to(np.asarray(period, dtype = np.float64), data.shape[1:])
+    overall_center = np.array([periodic_average_1d(data[:, dimension], period = period[dimension]) for dimension in range(data.shape[1])])
+    between = np.sum(counts * periodic_distance_square(centers, overall_center, period))
+    within = sum(np.sum(periodic_distance_square(data[start:start + chunk_size], centers[labels[start:start + chunk_size]], period)) for start in range(0, len(data), chunk_size))
+    if within == 0: return 1.0
+    return float(between * (len(data) - len(counts)) / (within * (len(counts) - 1)))
+
+
+def _centers(data: np.ndarray[float], labels: np.ndarray[int], counts: np.ndarray[int], period, centers: np.ndarray[float] | None):
+    if centers is not None:
+        centers = np.asarray(centers, dtype = np.float64)
+        if centers.shape != (len(counts), data.shape[1]): raise ValueError("centers must have one row per cluster and the dimension of data")
+        return centers
+    period = np.broadcast_to(np.asarray(period, dtype = np.float64), data.shape[1:])
+    return np.stack([periodic_average_segments(data[:, dimension], labels, len(counts), period = period[dimension]) for dimension in range(data.shape[1])], axis = 1)
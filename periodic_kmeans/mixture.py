@@ -0,0 +1,219 @@
+import numpy as np
+
+from .periodic_distance import nearest_centers
+
+
+_LARGE_CONCENTRATION = 1e4 # above this, the Bessel functions are evaluated by their asymptotic expansions
+_BESSEL_NODES = np.linspace(0, np.pi, 513)
+_BESSEL_WEIGHTS = np.full(513, 1 / 512) # trapezoidal rule for the average over [0, pi]
+_BESSEL_WEIGHTS[[0, -1]] /= 2
+
+
+def _scaled_bessel_i0_i1(kappa: np.ndarray[float]):
+    # exp(-kappa) I0(kappa) and exp(-kappa) I1(kappa), from I_n(kappa) = 1/pi int_0^pi exp(kappa cos t) cos(n t) dt with the trapezoidal rule, which converges exponentially for this periodic integrand
+    kappa = np.asarray(kappa, dtype = np.float64)
+    large = kappa > _LARGE_CONCENTRATION
+    integrand = np.exp(np.minimum(kappa, _LARGE_CONCENTRATION)[..., None] * (np.cos(_BESSEL_NODES) - 1))
+    i0 = integrand @ _BESSEL_WEIGHTS
+    i1 = integrand @ (_BESSEL_WEIGHTS * np.cos(_BESSEL_NODES))
+    with np.errstate(divide = "ignore"):
+        inverse = 1 / (8 * kappa)
+    scale = 1 / np.sqrt(2 * np.pi * np.maximum(kappa, 1))
+    i0 = np.where(large, scale * (1 + inverse + 9 / 2 * inverse**2), i0)
+    i1 = np.where(large, scale * (1 - 3 * inverse - 15 / 2 * inverse**2), i1)
+    return i0, i1
+
+
+def _log_normalization(kappa: np.ndarray[float], period: np.ndarray[float]):
+    # logarithm of the normalization period * I0(kappa) of the von Mises density in the units of the data
+    return np.log(period) + kappa + np.log(_scaled_bessel_i0_i1(kappa)[0])
+
+
+def _concentration(resultant: np.ndarray[float]):
+    # maximum likelihood concentration, solving I1(kappa) / I0(kappa) = mean resultant length with Newton steps from the approximation of Banerjee et al. (2005)
+    resultant = np.clip(resultant, 0, 1 - 1e-12)
+    kappa = resultant * (2 - resultant**2) / (1 - resultant**2)
+    for _ in range(3):
+        i0, i1 = _scaled_bessel_i0_i1(kappa)
+        ratio = i1 / i0
+        derivative = np.where(kappa > 0, 1 - ratio**2 - ratio / np.maximum(kappa, np.finfo(np.float64).tiny), 0.5)
+        kappa = np.maximum(kappa - (ratio - resultant) / derivative, 0)
+    return kappa
+
+
+class PeriodicGaussianMixture:
+    """!
+    @brief Mixture of products of von Mises distributions (the circular analogue of the normal distribution, one per dimension) fitted by expectation-maximization.
+
+    @details Each component has a weight and, in every dimension, a mean and a concentration. The E-step of a chunk of points accumulates the M-step statistics (responsibility-weighted sums of the cosines and the sines) right away, so an iteration is one pass over the data with memory proportional to chunk_size * k. The means are the weighted circular means, the maximum likelihood means of von Mises distributions.
+
+    """
+
+    def __init__(self, data, period = 1, no_of_clusters = None, initial_centers = None, weights = None, tolerance = 1e-6, itermax = 100, chunk_size = 65536, random_state = None):
+        """!
+        @param[in] data (array_like): Data of shape (N, D), e.g. a memory-mapped array.
+        @param[in] period (float or array_like): Period, common or per dimension.
+        @param[in] no_of_clusters (uint): Number of components when initial_centers are not given, which are then found by PeriodicKMeans.
+        @param[in] initial_centers (array_like): Optional initial means of shape (k, D).
+        @param[in] weights (array_like): Optional non-negative weights of the points, e.g. of a coreset.
+        @param[in] tolerance (double): Stop condition for the increase of the average log-likelihood per unit weight.
+        @param[in] itermax (uint): Maximum number of EM iterations.
+        @param[in] chunk_size (uint): Number of points handled at once.
+        @param[in] random_state (int): Seed for the initialization by PeriodicKMeans.
+
+        """
+        self.__pointer_data = np.asarray(data)
+        if self.__pointer_data.ndim != 2: raise ValueError("data must be a two-dimensional array")
+        if len(self.__pointer_data) == 0: raise ValueError("Input data is empty")
+        self.period = np.broadcast_to(np.asarray(period, dtype = np.float64), self.__pointer_data.shape[1:])
+        self.weights = None if weights is None else np.asarray(weights, dtype = np.float64)
+        if self.weights is not None and self.weights.shape != (len(self.__pointer_data),): raise ValueError("weights must have the same length as data")
+        if chunk_size <= 0: raise ValueError("chunk_size must be positive")
+        self.__tolerance = tolerance
+        self.__itermax = itermax
+        self.__chunk_size = chunk_size
+
+        if initial_centers is None:
+            if no_of_clusters is None or no_of_clusters <= 0: raise ValueError("no_of_clusters must be positive when initial_centers are not given")
+            from .periodic_kmeans import PeriodicKMeans # pyclustering is only needed for this initialization
+            kmeans = PeriodicKMeans(self.__pointer_data, period = period, no_of_clusters = no_of_clusters, random_state = random_state, weights = self.weights)
+            initial_centers = kmeans.process().get_centers()
+        self.__means = np.array(initial_centers, dtype = np.float64) % self.period
+        if self.__means.ndim != 2 or self.__means.shape[1] != self.__pointer_data.shape[1]: raise ValueError("initial_centers must have shape (k, D)")
+        self.__concentrations = np.zeros(self.__means.shape)
+        self.__mixture_weights = np.full(len(self.__means), 1 / len(self.__means))
+        self.__log_likelihood = -np.inf
+        self.__iterations = 0
+
+
+    def __chunks(self):
+        for start in range(0, len(self.__pointer_data), self.__chunk_size):
+            chunk = np.asarray(self.__pointer_data[start:start + self.__chunk_size], dtype = np.float64)
+            yield chunk, (None if self.weights is None else self.weights[start:start + self.__chunk_size])
+
+
+    def __angles(self, chunk):
+        angles = chunk * (2 * np.pi / self.period)
+        return np.cos(angles), np.sin(angles)
+
+
+    def __log_probabilities(self, cos_angles, sin_angles):
+        # log of weight times density of each component at each point, shape (n, k)
+        mean_angles = self.__means * (2 * np.pi / self.period)
+        log_probabilities = cos_angles @ (self.__concentrations * np.cos(mean_angles)).T
+        log_probabilities += sin_angles @ (self.__concentrations * np.sin(mean_angles)).T
+        with np.errstate(divide = "ignore"): # components without weight get -inf
+            log_probabilities += np.log(self.__mixture_weights) - _log_normalization(self.__concentrations, self.period).sum(axis = 1)
+        return log_probabilities
+
+
+    @staticmethod
+    def __log_sum_exp(log_probabilities):
+        maxima = np.max(log_probabilities, axis = 1, keepdims = True)
+        return (maxima + np.log(np.sum(np.exp(log_probabilities - maxima), axis = 1, keepdims = True)))[:, 0]
+
+
+    def __accumulate(self, responsibilities, cos_angles, sin_angles, chunk_weights, statistics):
+        if chunk_weights is not None: responsibilities = responsibilities * chunk_weights[:, None]
+        statistics[0] += responsibilities.sum(axis = 0)
+        statistics[1] += responsibilities.T @ cos_angles
+        statistics[2] += responsibilities.T @ sin_angles
+
+
+    def __maximize(self, statistics):
+        totals, cos_sums, sin_sums = statistics
+        occupied = totals > 0 # components without responsibility keep their means and concentrations
+        self.__mixture_weights = totals / totals.sum()
+        safe_totals = np.where(occupied, totals, 1)[:, None]
+        means = (np.arctan2(sin_sums, cos_sums) * (self.period / (2 * np.pi))) % self.period
+        concentrations = _concentration(np.hypot(cos_sums, sin_sums) / safe_totals)
+        self.__means = np.where(occupied[:, None], means, self.__means)
+        self.__concentrations = np.where(occupied[:, None], concentrations, self.__concentrations)
+
+
+    def process(self):
+        """!
+        @brief Fit the mixture by expectation-maximization, starting from the initial means.
+
+        @return (PeriodicGaussianMixture) Returns itself.
+
+        """
+        k, dimension = self.__means.shape
+        statistics = [np.zeros(k), np.zeros((k, dimension)), np.zeros((k, dimension))]
+        for chunk, chunk_weights in self.__chunks(): # the initial weights and concentrations come from the hard assignment to the initial means
+            labels, _ = nearest_centers(chunk, self.__means, self.period, chunk_size = self.__chunk_size)
+            self.__accumulate(np.eye(k)[labels], *self.__angles(chunk), chunk_weights, statistics)
+        self.__maximize(statistics)
+        total_weight = statistics[0].sum()
+
+        previous_log_likelihood = -np.inf
+        for self.__iterations in range(1, self.__itermax + 1):
+            statistics = [np.zeros(k), np.zeros((k, dimension)), np.zeros((k, dimension))]
+            log_likelihood = 0.0
+            for chunk, chunk_weights in self.__chunks():
+                cos_angles, sin_angles = self.__angles(chunk)
+                log_probabilities = self.__log_probabilities(cos_angles, sin_angles)
+                log_densities = self.__log_sum_exp(log_probabilities)
+                log_likelihood += np.sum(log_densities if chunk_weights is None else chunk_weights * log_densities)
+                np.subtract(log_probabilities, log_densities[:, None], out = log_probabilities)
+                self.__accumulate(np.exp(log_probabilities, out = log_probabilities), cos_angles, sin_angles, chunk_weights, statistics)
+            self.__log_likelihood = log_likelihood / total_weight # of the parameters before this M-step
+            self.__maximize(statistics)
+            if self.__log_likelihood - previous_log_likelihood <= self.__tolerance: break
+            previous_log_likelihood = self.__log_likelihood
+        return self
+
+
+    def score_samples(self, points):
+        """!
+        @brief Logarithm of the mixture density at each point.
+
+        """
+        points = np.asarray(points, dtype = np.float64)
+        return np.concatenate([self.__log_sum_exp(self.__log_probabilities(*self.__angles(points[start:start + self.__chunk_size]))) for start in range(0, len(points), self.__chunk_size)] or [np.empty(0)])
+
+
+    def predict_proba(self, points):
+        """!
+        @brief Responsibilities of the components for each point, of shape (len(points), k).
+
+        """
+        points = np.asarray(points, dtype = np.float64)
+        probabilities = np.empty((len(points), len(self.__means)))
+        for start in range(0, len(points), self.__chunk_size):
+            log_probabilities = self.__log_probabilities(*self.__angles(points[start:start + self.__chunk_size]))
+            probabilities[start:start + self.__chunk_size] = np.exp(log_probabilities - self.__log_sum_exp(log_probabilities)[:, None])
+        return probabilities
+
+
+    def predict(self, points):
+        """!
+        @brief Index of the most probable component for each point.
+
+        """
+        points = np.asarray(points, dtype = np.float64)
+        return np.concatenate([np.argmax(self.__log_probabilities(*self.__angles(points[start:start + self.__chunk_size])), axis = 1) for start in range(0, len(points), self.__chunk_size)] or [np.empty(0, dtype = np.intp)])
+
+
+    def get_centers(self):
+        return self.__means.tolist()
+
+
+    def get_concentrations(self):
+        return self.__concentrations.tolist()
+
+
+    def get_mixture_weights(self):
+        return self.__mixture_weights.tolist()
+
+
+    def get_log_likelihood(self):
+        """!
+        @brief Average log-likelihood per unit weight of the data at the last E-step.
+
+        """
+        return self.__log_likelihood
+
+
+    def get_iterations(self):
+        return self.__iterations
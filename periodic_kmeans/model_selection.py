@@ -0,0 +1,87 @@
+import numpy as np
+
+from .initialization import periodic_kmeans_plusplus
+from .metrics import _periodic_silhouette_scores
+from .periodic_distance import nearest_centers
+
+
+def _scan(data: np.ndarray[float], no_of_clusters_list: list[int], period, warm_start: bool, rng: np.random.Generator, kmeans_kwargs: dict):
+    # fit PeriodicKMeans for increasing numbers of clusters, each fit seeded from the previous one
+    from .periodic_kmeans import PeriodicKMeans # pyclustering is loaded on first use
+
+    if not warm_start: seeds = periodic_kmeans_plusplus(data, no_of_clusters_list[-1], period, random_state = rng) # k-means++ centers for k are a prefix of those for k + 1
+    centers, results = np.empty((0, data.shape[1])), []
+    for no_of_clusters in no_of_clusters_list:
+        if warm_start: initial_centers = periodic_kmeans_plusplus(data, no_of_clusters, period, initial_centers = centers[:no_of_clusters], random_state = rng) # keep the previous solution and draw only the new centers
+        else: initial_centers = seeds[:no_of_clusters]
+        kmeans_instance = PeriodicKMeans(data, period = period, initial_centers = initial_centers, **kmeans_kwargs)
+        kmeans_instance.process()
+        centers = np.array(kmeans_instance.get_centers())
+        labels, distances = nearest_centers(data, centers, period)
+        results.append((centers, labels, float(np.sum(distances))))
+    return results
+
+
+def _elbow(no_of_clusters_list: list[int], inertia: list[float]):
+    # the point of the inertia curve farthest below the chord joining its ends, both axes normalized to [0, 1]
+    if len(no_of_clusters_list) < 3: return no_of_clusters_list[int(np.argmin(inertia))]
+    x, y = np.array(no_of_clusters_list, dtype = np.float64), np.array(inertia)
+    x = (x - x[0]) / (x[-1] - x[0])
+    y = (y - y.min()) / (np.ptp(y) or 1)
+    chord = y[0] + (y[-1] - y[0]) * x
+    return no_of_clusters_list[int(np.argmax(chord - y))]
+
+
+def select_no_of_clusters(data, no_of_clusters_range, period = 1, criterion = "silhouette", warm_start = True, sample_size = 10000, n_references = 5, random_state = None, **kwargs):
+    """!
+    @brief Fit PeriodicKMeans for a range of numbers of clusters and choose the best one.
+
+    @details The numbers of clusters are scanned in increasing order. With warm_start, the fit for k starts from the solution for the previous k plus new centers drawn by k-means++ against it, otherwise all fits start from prefixes of a single k-means++ seeding. The silhouette score is computed on a random sample of at most sample_size points (the same for all k, sharing the distance computation), the gap statistic compares with n_references uniform reference datasets of the sample size.
+
+    @param[in] data (array_like): Data of shape (N, D).
+    @param[in] no_of_clusters_range (iterable): Numbers of clusters to try.
+    @param[in] period (float or array_like): Period, common or per dimension.
+    @param[in] criterion (str): "elbow" (inertia curve knee), "silhouette" (maximum periodic silhouette) or "gap" (gap statistic).
+    @param[in] warm_start (boolean): Start each fit from the previous solution.
+    @param[in] sample_size (uint): Number of points used for the silhouette and the gap references.
+    @param[in] n_references (uint): Number of reference datasets for the gap statistic.
+    @param[in] random_state (int): Seed for the seeding, the sampling and the reference datasets.
+    @param[in] **kwargs: Arguments passed to PeriodicKMeans, e.g. tolerance or itermax.
+
+    @return (dict) 'no_of_clusters' (scanned values), 'inertia', 'centers' and 'labels' for each of them, the criterion curve ('silhouette' or 'gap' and 'gap_std') and the chosen 'best_no_of_clusters'.
+
+    """
+    data = np.asarray(data, dtype = np.float64)
+    if data.ndim == 1: data = data[:, None]
+    no_of_clusters_list = sorted(set(int(no_of_clusters) for no_of_clusters in no_of_clusters_range))
+    if not no_of_clusters_list or no_of_clusters_list[0] < 1: raise ValueError("no_of_clusters_range must contain positive numbers of clusters")
+    if criterion not in ("elbow", "silhouette", "gap"): raise ValueError("criterion must be 'elbow', 'silhouette' or 'gap'")
+    rng = np.random.default_rng(random_state)
+    sample_size = min(sample_size, len(data))
+
+    fits = _scan(data, no_of_clusters_list, period, warm_start, rng, kwargs)
+    result = {"no_of_clusters": no_of_clusters_list, "inertia": [inertia for _, _, inertia in fits], "centers": [centers for centers, _, _ in fits], "labels": [labels for _, labels, _ in fits]}
+
+    if criterion == "elbow":
+        result["best_no_of_clusters"] = _elbow(no_of_clusters_list, result["inertia"])
+
+    elif criterion == "silhouette":
+        sample = rng.choice(len(data), sample_size, replace = False) if sample_size < len(data) else np.arange(len(data))
+        scored = [index for index, (_, labels, _) in enumerate(fits) if 2 <= len(np.unique(labels[sample])) <= sample_size - 1] # the silhouette is undefined for a single cluster
+        scores = _periodic_silhouette_scores(data[sample], [fits[index][1][sample] for index in scored], period) if scored else []
+        result["silhouette"] = [np.nan] * len(fits)
+        for index, score in zip(scored, scores): result["silhouette"][index] = score
+        if not scored: raise ValueError("Silhouette requires at least two non-empty clusters")
+        result["best_no_of_clusters"] = no_of_clusters_list[int(np.nanargmax(result["silhouette"]))]
+
+    else: # gap statistic of Tibshirani, Walther and Hastie (2001) with reference datasets uniform on the torus
+        log_inertia = np.log(np.array(result["inertia"]) * sample_size / len(data)) # rescaled to the size of the reference datasets
+        period_array = np.broadcast_to(np.asarray(period, dtype = np.float64), data.shape[1:])
+        reference_log_inertia = np.array([[np.log(inertia) for _, _, inertia in _scan(rng.random((sample_size, data.shape[1])) * period_array, no_of_clusters_list, period, warm_start, rng, kwargs)] for _ in range(n_references)])
+        gap = reference_log_inertia.mean(axis = 0) - log_inertia
+        gap_std = reference_log_inertia.std(axis = 0) * np.sqrt(1 + 1 / n_references)
+        result["gap"], result["gap_std"] = gap.tolist(), gap_std.tolist()
+        best = next((index for index in range(len(gap) - 1) if gap[index] >= gap[index + 1] - gap_std[index + 1]), len(gap) - 1) # the smallest k with gap(k) >= gap(k + 1) - s(k + 1)
+        result["best_no_of_clusters"] = no_of_clusters_list[best]
+
+    return result
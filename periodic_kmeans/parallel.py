@@ -0,0 +1,134 @@
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+NUM_THREADS_ENVIRONMENT_VARIABLE = "PERIODIC_KMEANS_NUM_THREADS"
+
+
+def _available_cpus():
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+
+def resolve_n_threads(n_threads: int | None = None):
+    """!
+    @brief Turn a requested number of threads into a positive count.
+
+    @param[in] n_threads (int): Number of threads; None reads the PERIODIC_KMEANS_NUM_THREADS environment variable and falls back to 1; negative values count from the number of available CPUs, -1 meaning all of them (as in joblib).
+
+    """
+    if n_threads is None: n_threads = int(os.environ.get(NUM_THREADS_ENVIRONMENT_VARIABLE, 1))
+    if n_threads == 0: raise ValueError("n_threads must not be zero")
+    if n_threads < 0: n_threads = max(1, _available_cpus() + 1 + n_threads)
+    return n_threads
+
+
+def limit_native_threads(n_threads: int):
+    """!
+    @brief Limit the BLAS/OpenMP thread pools while n_threads Python threads are running, to avoid oversubscribing the CPUs.
+
+    @details Requires the optional threadpoolctl package, otherwise nothing is limited.
+
+    """
+    if n_threads <= 1: return contextlib.nullcontext()
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return contextlib.nullcontext()
+    return threadpool_limits(limits = max(1, _available_cpus() // n_threads))
+
+
+def parallel_map(function, items, n_threads: int = 1):
+    """!
+    @brief Apply function to all items, in a thread pool if n_threads > 1, keeping the order of the results.
+
+    """
+    if n_threads <= 1: return [function(item) for item in items]
+    with limit_native_threads(n_threads), ThreadPoolExecutor(n_threads) as executor:
+        return list(executor.map(function, items))
+
+
+def _periodic_distance_block(centers: np.ndarray[float], points: np.ndarray[float], period: np.ndarray[float], out: np.ndarray[float], scratch: np.ndarray[float], transform):
+    scratch = scratch[:len(centers), :len(points)]
+    period = np.broadcast_to(period, centers.shape[1:])
+    for dimension in range(centers.shape[1]):
+        difference = out if dimension == 0 else scratch
+        np.subtract(centers[:, dimension, None], points[None, :, dimension], out = difference)
+        difference += period[dimension] / 2
+        np.remainder(difference, period[dimension], out = difference)
+        difference -= period[dimension] / 2 # wrapping giving the smallest absolute difference in each coordinate
+        transform(difference, out = difference)
+        if dimension > 0: np.add(out, difference, out = out)
+
+
+def periodic_distance_square_block(centers: np.ndarray[float], points: np.ndarray[float], period: np.ndarray[float], out: np.ndarray[float], scratch: np.ndarray[float]):
+    """!
+    @brief Square periodic distances from each center to each point of a block, evaluated in place.
+
+    @details The dimensions are accumulated one by one into out, which avoids a slow reduction over a short trailing axis. The sums equal those of periodic_distance_square up to rounding, as numpy adds 8 or more dimensions pairwise.
+
+    @param[in] centers (numpy.array): Centers of shape (k, D).
+    @param[in] points (numpy.array): Points of shape (b, D).
+    @param[in] period (numpy.array): Period, of shape (D,) or scalar.
+    @param[out] out (numpy.array): Output of shape (k, b).
+    @param[in] scratch (numpy.array): Work buffer of shape at least (k, b), only its leading part is used.
+
+    """
+    _periodic_distance_block(centers, points, period, out, scratch, np.square)
+
+
+def periodic_manhattan_distance_block(centers: np.ndarray[float], points: np.ndarray[float], period: np.ndarray[float], out: np.ndarray[float], scratch: np.ndarray[float]):
+    """!
+    @brief Periodic Manhattan distances from each center to each point of a block, evaluated in place as by periodic_distance_square_block().
+
+    """
+    _periodic_distance_block(centers, points, period, out, scratch, np.absolute)
+
+
+def _parallel_distances(block_kernel, centers, points, period, n_threads, out, block_size, scratch):
+    centers, points = np.asarray(centers), np.asarray(points)
+    period = np.asarray(period, dtype = np.float64)
+    if out is None: out = np.empty((len(centers), len(points)))
+    n_blocks = -(-len(points) // block_size)
+    n_threads = max(1, min(n_threads, n_blocks))
+    if scratch is None: scratch = [np.empty((len(centers), min(block_size, len(points)))) for _ in range(n_threads)]
+
+    def work(index_thread):
+        for index_block in range(index_thread, n_blocks, n_threads):
+            start = index_block * block_size
+            block_kernel(centers, points[start:start + block_size], period, out[:, start:start + block_size], scratch[index_thread])
+
+    parallel_map(work, range(n_threads), n_threads)
+    return out
+
+
+def parallel_periodic_distance_square(centers: np.ndarray[float], points: np.ndarray[float], period, n_threads: int = 1, out: np.ndarray[float] | None = None, block_size: int = 4096, scratch: list[np.ndarray[float]] | None = None):
+    """!
+    @brief Matrix of square periodic distances from each center to each point, computed by blocks of points in a thread pool.
+
+    @details NumPy releases the GIL inside the ufunc loops, so the threads run concurrently. Each thread owns one scratch buffer and handles every n_threads-th block, writing directly into the slices of out, so nothing is allocated per block.
+
+    @param[in] centers (array_like): Centers of shape (k, D).
+    @param[in] points (array_like): Points of shape (N, D).
+    @param[in] period (float or array_like): Period, common or per dimension.
+    @param[in] n_threads (uint): Number of threads.
+    @param[out] out (numpy.array): Optional output of shape (k, N).
+    @param[in] block_size (uint): Number of points per block.
+    @param[in] scratch (list): Optional per-thread work buffers of shape at least (k, block_size), allocated if not given.
+
+    @return (numpy.array) Square distances of shape (k, N).
+
+    """
+    return _parallel_distances(periodic_distance_square_block, centers, points, period, n_threads, out, block_size, scratch)
+
+
+def parallel_periodic_manhattan_distance(centers: np.ndarray[float], points: np.ndarray[float], period, n_threads: int = 1, out: np.ndarray[float] | None = None, block_size: int = 4096, scratch: list[np.ndarray[float]] | None = None):
+    """!
+    @brief Matrix of periodic Manhattan distances from each center to each point, computed as by parallel_periodic_distance_square().
+
+    @return (numpy.array) Manhattan distances of shape (k, N).
+
+    """
+    return _parallel_distances(periodic_manhattan_distance_block, centers, points, period, n_threads, out, block_size, scratch)
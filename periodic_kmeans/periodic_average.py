@@ -1,24 +1,116 @@
+import itertools
 import numpy as np
 from typing import Literal
 
+from .periodic_distance import periodic_difference
+from .reproducible import exact_best_average, exact_sums, screening_margin, to_float, to_fraction
 
-def periodic_average_1d(a: np.ndarray[float], weights: np.ndarray[float] | None = None, period: float = 1):
+
+METHODS = ("exact", "trig", "binned-exact")
+
+
+def _circular_mean(a: np.ndarray[float], weights: np.ndarray[float], period: float):
+    # direction of the weighted resultant vector of the angles of a, and the length of that vector (zero when the direction is undefined)
+    angles = a * (2 * np.pi / period)
+    cos_sum, sin_sum = weights @ np.cos(angles), weights @ np.sin(angles)
+    return (np.arctan2(sin_sum, cos_sum) * (period / (2 * np.pi))) % period, np.hypot(cos_sum, sin_sum)
+
+
+def _binned_exact_average(a: np.ndarray[float], weights: np.ndarray[float], period: float):
+    # the same least-squares average as the general case of periodic_average_1d (a wrapped to [0, period), weights normalized), sorting only the values of a few bins instead of all of a
+    # shifting by a period the values below a threshold between two bins only needs the weights and the weighted sums of the bins, so these thresholds are all evaluated from a histogram
+    n_bins = max(16, int(np.sqrt(len(a))))
+    bins = np.minimum((a * (n_bins / period)).astype(np.intp), n_bins - 1) # nondecreasing in a
+    bin_weights = np.bincount(bins, weights = weights, minlength = n_bins)
+    bin_sums = np.bincount(bins, weights = weights * a, minlength = n_bins)
+    minima = np.full(n_bins, np.inf)
+    np.minimum.at(minima, bins, a)
+    sum_a = bin_sums.sum()
+
+    def objective(shifted_weights, shifted_sums): # weighted sum of squared differences with the mean, up to the weighted sum of squares of a, which does not depend on the shift
+        return 2 * period * shifted_sums + period**2 * shifted_weights - (sum_a + period * shifted_weights)**2
+
+    before_weights = np.concatenate(([0], np.cumsum(bin_weights))) # shifted weights and sums for the thresholds at the bin edges
+    before_sums = np.concatenate(([0], np.cumsum(bin_sums)))
+    boundary_objectives = objective(before_weights, before_sums)
+    best = np.argmin(boundary_objectives)
+    best_objective, best_weight = boundary_objectives[best], before_weights[best]
+    # thresholds inside a bin shift some of its smallest values, each at least its minimum, and the objective is concave in their weight, so it is bounded below by its values at both ends
+    lower_bounds = np.minimum(boundary_objectives[:-1], objective(before_weights[1:], before_sums[:-1] + bin_weights * np.where(bin_weights > 0, minima, 0)))
+    candidates = (bin_weights > 0) & (lower_bounds < best_objective)
+    selected = candidates[bins]
+    if np.count_nonzero(selected) > len(a) // 8: # rarely (e.g. for nearly uniform data), the bins are narrowed further by a trigonometric bound, which costs more than the histogram
+        # the trigonometric cost 2 (1 - cos x) <= x^2 bounds the least-squares cost from below, so the average lies where the trigonometric cost does not exceed the least-squares cost of the circular mean, an arc around it; the threshold is the antipode of the average
+        circular_mean, resultant = _circular_mean(a, weights, period)
+        if resultant > 0:
+            cost = weights @ np.square(periodic_difference(a, circular_mean, period))
+            cos_half_width = 1 - cost * (2 * np.pi / period)**2 / (2 * resultant)
+            if cos_half_width > -1:
+                half_width = np.arccos(cos_half_width) * (period / (2 * np.pi)) + 1e-9 * period # with a margin for rounding
+                bin_centers = (np.arange(n_bins) + 0.5) * (period / n_bins)
+                candidates &= np.abs(periodic_difference(bin_centers, circular_mean + period / 2, period)) - period / (2 * n_bins) <= half_width
+                selected = candidates[bins]
+    if selected.any():
+        values, value_weights, value_bins = a[selected], weights[selected], bins[selected]
+        order = np.argsort(values) # also sorts by bin
+        values, value_weights, value_bins = values[order], value_weights[order], value_bins[order]
+        starts = np.searchsorted(value_bins, value_bins, side = "left") # first position of the bin of each value
+        cumsum_w = np.concatenate(([0], np.cumsum(value_weights)))
+        cumsum_wa = np.concatenate(([0], np.cumsum(value_weights * values)))
+        shifted_weights = before_weights[value_bins] + cumsum_w[1:] - cumsum_w[starts] # shift the values of the bin up to this one, after all the values of the previous bins
+        shifted_sums = before_sums[value_bins] + cumsum_wa[1:] - cumsum_wa[starts]
+        objectives = objective(shifted_weights, shifted_sums)
+        if objectives[best := np.argmin(objectives)] < best_objective: best_weight = shifted_weights[best]
+    return (sum_a + best_weight * period) % period
+
+
+def _reproducible_average(a: np.ndarray[float], weights: np.ndarray[float], period: float, method: str):
+    # the average of periodic_average_1d (a wrapped to [0, period), weights not normalized) computed from exact sums, bitwise independent of the order of a and of how the sums are split (see DistributedPeriodicKMeans)
+    if method == "trig":
+        angles = a * (2 * np.pi / period)
+        cos_sum, sin_sum = (to_float(total) for total in exact_sums(np.concatenate((weights * np.cos(angles), weights * np.sin(angles))), np.repeat([0, 1], len(a)), 2))
+        if np.hypot(cos_sum, sin_sum) > 0: return (np.arctan2(sin_sum, cos_sum) * (period / (2 * np.pi))) % period
+    # "exact" and "binned-exact" define the same average: float prefix sums screen the thresholds between distinct values, the few within the rounding margin of the best are compared exactly
+    order = np.argsort(a)
+    a, weights = a[order], weights[order]
+    weighted = weights * a
+    positions = np.concatenate(([0], np.flatnonzero(np.diff(a)) + 1, [len(a)])) # numbers of values below the thresholds, from none to all
+    shifted_weights = np.concatenate(([0], np.cumsum(weights)))[positions]
+    shifted_sums = np.concatenate(([0], np.cumsum(weighted)))[positions]
+    objectives = 2 * period * shifted_sums + period**2 * shifted_weights - (shifted_sums[-1] + period * shifted_weights)**2 / shifted_weights[-1]
+    candidates = positions[objectives <= objectives.min() + screening_margin(len(a), shifted_weights[-1], period)]
+    segments = np.searchsorted(candidates, np.arange(len(a)), side = "right") # values between consecutive candidate thresholds
+    segment_weights = exact_sums(weights, segments, len(candidates) + 1)
+    segment_sums = exact_sums(weighted, segments, len(candidates) + 1)
+    prefix_weights, prefix_sums = list(itertools.accumulate(segment_weights)), list(itertools.accumulate(segment_sums)) # exact, up to each candidate threshold and then in total
+    return exact_best_average([(to_fraction(prefix_weights[i]), to_fraction(prefix_sums[i])) for i in range(len(candidates))], to_fraction(prefix_weights[-1]), to_fraction(prefix_sums[-1]), period)
+
+
+def periodic_average_1d(a: np.ndarray[float], weights: np.ndarray[float] | None = None, period: float = 1, method: Literal["exact", "trig", "binned-exact"] = "exact", reproducible: bool = False):
+    # method: "exact" minimizes the weighted sum of squared periodic differences by sorting a, "binned-exact" gives the same average sorting only a small part of a, and "trig" returns the circular mean (the direction of the mean of the unit vectors of the angles) in O(n), which is close to the least-squares average for concentrated data
+    # reproducible: compute the sums exactly, so that the result is bitwise the same for any order of a, at the cost of a few more passes
     if a.ndim != 1: raise ValueError("a must be a one-dimensional ndarray")
+    if method not in METHODS: raise ValueError(f"method must be one of {METHODS}")
 
     if weights is None: weights = np.ones_like(a) # equal weights by default, the number does not matter
     if weights.ndim != 1: raise ValueError("weights must be a one-dimensional ndarray")
     if weights.shape != a.shape: raise ValueError("weights must have the same length as a")
     if (sum_w := weights.sum()) <= 0: raise ValueError("Sum of weights must be positive")
-    if any(weight < 0 for weight in weights): raise ValueError("weights must not be negative")
+    if np.any(weights < 0): raise ValueError("weights must not be negative")
 
+    if reproducible: return _reproducible_average(a % period, weights, period, method) # without normalizing the weights, which would round them
     weights = weights / sum_w # normalize
     a = a % period # wrap "canonically" to [0, period)
+    if method == "trig":
+        circular_mean, resultant = _circular_mean(a, weights, period)
+        if resultant > 0: return circular_mean # otherwise the direction is undefined, fall back to the exact average
     simple_average = np.average(a, weights = weights)
     period_2 = period / 2
     if a.max() - a.min() <= period_2: return simple_average # trivial case
     # if there exists a wrapping in which the range is narrower than period/2, it's enough to try [period/2, 3 period/2) in addition to the "canonical" one, as Miniak-Górecka, Podlaski and Gwizdałła 2022 suggested, here is a shorter implementation of their algorithm
     a2 = a + (a < period_2) * period
     if a2.max() - a2.min() <= period_2: return np.average(a2, weights = weights) % period
+    if method == "binned-exact": return _binned_exact_average(a, weights, period)
     # general case, when range is unavoidably wider than period/2
     # first, sort a (coalescing the equal elements) and reorder (and collapse) weights in the same way
     a, idx = np.unique(a, return_inverse = True) # remove repeating elements (this involves sorting) but remember their original positions (idx is the same length as original a containing indices of unique elements in new a)
@@ -31,7 +123,7 @@ def periodic_average_1d(a: np.ndarray[float], weights: np.ndarray[float] | None
     return new_averages[np.argmin(weighted_sums_of_squared_differences)] % period # the best average is the one that minimizes the weighted sum of squares
 
 
-def periodic_average_2d(a: np.ndarray[float], axis: Literal[-2, -1, 0, 1] = 0, weights: np.ndarray[float] | None = None, period: float | np.ndarray[float] = 1):
+def periodic_average_2d(a: np.ndarray[float], axis: Literal[-2, -1, 0, 1] = 0, weights: np.ndarray[float] | None = None, period: float | np.ndarray[float] = 1, method: Literal["exact", "trig", "binned-exact"] = "exact", reproducible: bool = False):
     if a.ndim != 2: raise ValueError("a must be a two-dimensional ndarray")
 
     if axis > 1 or axis < -2: raise ValueError("Illegal axis for a two-dimensional ndarray")
@@ -42,10 +134,49 @@ def periodic_average_2d(a: np.ndarray[float], axis: Literal[-2, -1, 0, 1] = 0, w
     if weights.ndim != 1: raise ValueError("weights must be a one-dimensional ndarray")
     if len(weights) != len(a): raise ValueError("weights must have the same length as a along the axis")
     if weights.sum() <= 0: raise ValueError("Sum of weights must be positive")
-    if any(weight < 0 for weight in weights): raise ValueError("weights must not be negative")
+    if np.any(weights < 0): raise ValueError("weights must not be negative")
 
     if np.shape(period) == tuple(): period = np.repeat(period, a.shape[not axis])
     if period.ndim != 1: raise ValueError("period must be a one-dimensional ndarray")
     if len(period) != a.shape[1]: raise ValueError("period must have the same length as a along the other axis")
 
-    return np.array([periodic_average_1d(a[:, i], weights = weights, period = period[i]) for i in range(a.shape[1])])
\ No newline at end of file
+    return np.array([periodic_average_1d(a[:, i], weights = weights, period = period[i], method = method, reproducible = reproducible) for i in range(a.shape[1])])
+
+
+def periodic_average_segments(a: np.ndarray[float], segments: np.ndarray[int], n_segments: int | None = None, weights: np.ndarray[float] | None = None, period: float = 1):
+    # periodic averages of many independent groups (segments) of a at once, the same least-squares criterion as periodic_average_1d evaluated with one sort and segment-local cumulative sums; empty segments (or segments with zero total weight) get nan
+    if a.ndim != 1: raise ValueError("a must be a one-dimensional ndarray")
+    if segments.shape != a.shape: raise ValueError("segments must have the same length as a")
+    if n_segments is None: n_segments = int(segments.max()) + 1 if len(segments) else 0
+    if len(segments) and (segments.min() < 0 or segments.max() >= n_segments): raise ValueError("segments must be in [0, n_segments)")
+
+    if weights is None: weights = np.ones(a.shape)
+    if weights.shape != a.shape: raise ValueError("weights must have the same length as a")
+    if np.any(weights < 0): raise ValueError("weights must not be negative")
+
+    a = a % period
+    order = np.argsort(a) # sort by value, then (stably, which is fast for integers) by segment, equivalent to but faster than np.lexsort
+    order = order[np.argsort(segments[order].astype(np.min_scalar_type(max(n_segments - 1, 0))), kind = "stable")] # narrow integers get the radix sort
+    a, weights, segments = a[order], weights[order], segments[order]
+    sum_w = np.bincount(segments, weights = weights, minlength = n_segments)
+    sum_wa = np.bincount(segments, weights = weights * a, minlength = n_segments)
+    sum_waa = np.bincount(segments, weights = weights * a**2, minlength = n_segments)
+    counts = np.bincount(segments, minlength = n_segments)
+    starts = np.searchsorted(segments, np.arange(n_segments)) # position of the first element of each segment in the sorted arrays
+    # cumulative sums restarting at each segment: global cumulative sums minus their value just before the segment start
+    cumsum_w = np.cumsum(weights)
+    cumsum_w -= np.concatenate(([0], cumsum_w))[starts][segments]
+    cumsum_wa = np.cumsum(weights * a)
+    cumsum_wa -= np.concatenate(([0], cumsum_wa))[starts][segments]
+    # as in periodic_average_1d, try to shift elements 0 through i of each segment by a period forward
+    valid = sum_w > 0
+    nonempty = counts > 0
+    sum_w_safe = np.where(valid, sum_w, 1) # avoid dividing by zero for segments without weight, their results are discarded
+    new_averages = (sum_wa[segments] + cumsum_w * period) / sum_w_safe[segments]
+    weighted_sums_of_squared_differences = sum_waa[segments] + 2 * cumsum_wa * period + cumsum_w * period**2 - sum_w[segments] * new_averages**2
+    minima = np.minimum.reduceat(weighted_sums_of_squared_differences, starts[nonempty]) # segments are contiguous, so the starts of all the non-empty ones (with or without weight) delimit them
+    candidates = np.flatnonzero(weighted_sums_of_squared_differences == np.repeat(minima, counts[nonempty]))
+    best = candidates[np.searchsorted(segments[candidates], np.flatnonzero(nonempty))] # the first minimum within each non-empty segment
+    averages = np.full(n_segments, np.nan)
+    averages[valid] = new_averages[best[valid[nonempty]]] % period
+    return averages
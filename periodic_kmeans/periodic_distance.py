@@ -0,0 +1,91 @@
+import numpy as np
+
+
+def periodic_difference(object1: np.ndarray[float], object2: np.ndarray[float], period: float | np.ndarray[float] = 1):
+    """!
+    @brief Calculate the coordinate-wise difference between two objects wrapped to [-period/2, period/2).
+
+    @param[in] object1 (array_like): The first array_like object.
+    @param[in] object2 (array_like): The second array_like object, broadcastable against the first.
+    @param[in] period (float or array_like): Period, common or per dimension.
+
+    @return (numpy.array) Wrapped differences giving the smallest absolute difference in each coordinate.
+
+    """
+    period = np.asarray(period)
+    return (np.subtract(object1, object2) + period / 2) % period - period / 2
+
+
+def periodic_distance_square(object1: np.ndarray[float], object2: np.ndarray[float], period: float | np.ndarray[float] = 1, simple: bool = True):
+    """!
+    @brief Calculate square Euclidean distance with periodicity between two objects using numpy.
+
+    @param[in] object1 (array_like): The first array_like object.
+    @param[in] object2 (array_like): The second array_like object.
+    @param[in] period (float or array_like): Period, common or per dimension.
+    @param[in] simple (boolean): If False, compute the full distance matrix between all pairs in two sets of points.
+
+    @return (numpy.array) Square Euclidean distance between two objects.
+
+    """
+    object1, object2 = np.asarray(object1), np.asarray(object2)
+    diff_wrapped = periodic_difference(object1, object2, period) if simple else periodic_difference(object1[:, None, :], object2[None, :, :], period)
+    return np.sum(np.square(diff_wrapped), axis=-1)
+
+
+def nearest_centers(points: np.ndarray[float], centers: np.ndarray[float], period: float | np.ndarray[float] = 1, chunk_size: int = 65536):
+    """!
+    @brief Find the closest center for each point, processing the points in chunks to bound the memory usage.
+
+    @param[in] points (array_like): Points of shape (N, D).
+    @param[in] centers (array_like): Centers of shape (k, D).
+    @param[in] period (float or array_like): Period, common or per dimension.
+    @param[in] chunk_size (uint): Number of points handled at once, the temporary memory is proportional to chunk_size * k * D.
+
+    @return (numpy.array, numpy.array) Index of the closest center and the square distance to it for each point.
+
+    """
+    points, centers = np.asarray(points), np.asarray(centers)
+    if points.ndim != 2 or centers.ndim != 2: raise ValueError("points and centers must be two-dimensional arrays")
+    if points.shape[1] != centers.shape[1]: raise ValueError("points and centers must have the same dimension")
+    if chunk_size <= 0: raise ValueError("chunk_size must be positive")
+
+    labels = np.empty(len(points), dtype = np.intp)
+    distances = np.empty(len(points), dtype = np.result_type(points.dtype, centers.dtype, np.float32))
+    for start in range(0, len(points), chunk_size):
+        chunk_distances = periodic_distance_square(points[start:start + chunk_size], centers, period, simple = False)
+        labels[start:start + chunk_size] = np.argmin(chunk_distances, axis = 1)
+        distances[start:start + chunk_size] = np.take_along_axis(chunk_distances, labels[start:start + chunk_size, None], axis = 1)[:, 0]
+    return labels, distances
+
+
+def circular_distance_sums(queries: np.ndarray[float], values: np.ndarray[float], period: float = 1, weights: np.ndarray[float] | None = None):
+    """!
+    @brief Calculate the (weighted) sum of one-dimensional periodic distances from each query to all the values in O((N + M) log M).
+
+    @details The values are sorted once and laid out over three periods with prefix sums, then the window of length period centered on each query contains exactly one image of every value, split at the query into the values below and above it.
+
+    @param[in] queries (array_like): One-dimensional array of query points.
+    @param[in] values (array_like): One-dimensional array of values.
+    @param[in] period (float): Period.
+    @param[in] weights (array_like): Optional weights of the values.
+
+    @return (numpy.array) Sum over values of weight * |wrapped(query - value)| for each query.
+
+    """
+    queries, values = np.asarray(queries) % period, np.asarray(values) % period
+    if queries.ndim != 1 or values.ndim != 1: raise ValueError("queries and values must be one-dimensional arrays")
+    if weights is None: weights = np.ones(len(values))
+    if np.shape(weights) != values.shape: raise ValueError("weights must have the same length as values")
+
+    order = np.argsort(values)
+    extended = np.concatenate((values[order] - period, values[order], values[order] + period))
+    extended_weights = np.tile(np.asarray(weights, dtype = np.float64)[order], 3)
+    cumsum_w = np.concatenate(([0], np.cumsum(extended_weights)))
+    cumsum_wv = np.concatenate(([0], np.cumsum(extended_weights * extended)))
+    low = np.searchsorted(extended, queries - period / 2, side = "left")
+    high = low + len(values) # the window holds exactly one image of each value, deriving its end from its start keeps that true under rounding
+    middle = np.clip(np.searchsorted(extended, queries, side = "left"), low, high)
+    below = (cumsum_w[middle] - cumsum_w[low]) * queries - (cumsum_wv[middle] - cumsum_wv[low])
+    above = (cumsum_wv[high] - cumsum_wv[middle]) - (cumsum_w[high] - cumsum_w[middle]) * queries
+    return below + above
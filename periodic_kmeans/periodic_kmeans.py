@@ -1,20 +1,53 @@
+import os
+import time
+
 import numpy
-from jax import numpy as jnp
 from pyclustering.cluster.center_initializer import kmeans_plusplus_initializer
 from pyclustering.cluster.kmeans import kmeans
 from pyclustering.utils.metric import distance_metric, type_metric
 
-from .periodic_average import periodic_average_2d
+from .initialization import periodic_kmeans_plusplus
+from .parallel import parallel_map, parallel_periodic_distance_square, resolve_n_threads
+from .periodic_average import METHODS, periodic_average_2d
+from .predictor import PeriodicKMeansPredictor
+from .reproducible import exact_sum, to_float
+from .workspace import PeriodicWorkspace
+
+
+EMPTY_CLUSTER_STRATEGIES = ("drop", "farthest", "split")
+CHECKPOINT_FORMAT_VERSION = 1
 
 
 class PeriodicKMeans(kmeans):
 
-    def __init__(self, data, period = 1, initial_centers = None, no_of_clusters = None, random_state = None):
+    def __init__(self, data, period = 1, initial_centers = None, no_of_clusters = None, random_state = None, weights = None, n_threads = 1, workspace = False, method = "exact", reproducible = False, empty_clusters = "drop", time_budget = None, checkpoint = None, checkpoint_interval = 60.0, lean = False, keep_data = True, **kwargs):
+        if method not in METHODS: raise ValueError(f"method must be one of {METHODS}")
+        if empty_clusters not in EMPTY_CLUSTER_STRATEGIES: raise ValueError(f"empty_clusters must be one of {EMPTY_CLUSTER_STRATEGIES}")
         self.period = period
         self.period_2 = period / 2
+        self.n_threads = resolve_n_threads(n_threads) # threads for the assignment and the center update, None to read PERIODIC_KMEANS_NUM_THREADS
+        self.weights = None if weights is None else numpy.asarray(weights, dtype = numpy.float64) # optional weights of the points, e.g. of a coreset
+        if self.weights is not None and self.weights.shape != (len(data),): raise ValueError("weights must have the same length as data")
+        self.use_workspace = workspace # reuse buffers allocated at fit time in all iterations
+        self.method = method # periodic average of the center update, see periodic_average_1d
+        self.reproducible = reproducible # exact sums for the centers and the total wce, bitwise independent of n_threads and of the order of the points
+        self.empty_clusters = empty_clusters # "drop" removes the clusters left without points, "farthest" reseeds them with the points farthest from their centers, "split" with a part of the largest cluster
+        self.time_budget = time_budget # seconds, process() stops before an iteration that is expected to exceed it, the result so far is kept
+        self.checkpoint = checkpoint # path of the .npz file where process() saves its state, see resume()
+        self.checkpoint_interval = checkpoint_interval # minimum time in seconds between two checkpoints, the final state is always saved
+        self.lean = lean # use an ndarray data (e.g. a memory-mapped one) in place instead of copying it, and store the cluster indices in 32 bits
+        self.keep_data = keep_data # if False, process() releases the data at the end, see release_data()
+        self._workspace = None
+        self._fit_statistics = {}
+        self._resume_state = None
+        self._labels = numpy.empty(0, dtype = numpy.uint8)
         _metric = distance_metric(type_metric.USER_DEFINED, func = self.periodic_euclidean_distance_square_numpy)
-        _centers = kmeans_plusplus_initializer(data, no_of_clusters, metric = _metric, random_state = random_state).initialize() if initial_centers is None else initial_centers
-        super().__init__(data, _centers, metric = _metric)
+        if lean: data = numpy.asarray(data) # no copy for arrays
+        if initial_centers is not None: _centers = initial_centers
+        elif self.weights is not None or lean: _centers = periodic_kmeans_plusplus(data, no_of_clusters, period, weights = self.weights, random_state = random_state) # pyclustering's initializer does not support weights, and copies the data
+        else: _centers = kmeans_plusplus_initializer(data, no_of_clusters, metric = _metric, random_state = random_state).initialize()
+        super().__init__(data[:1] if lean else data, _centers, metric = _metric, **kwargs) # e.g. tolerance, itermax or observer; pyclustering copies the data it is given, so in lean mode it only gets the first point
+        if lean: self._kmeans__pointer_data = data
 
 
     def periodic_euclidean_distance_square_numpy(self, object1, object2, simple = True, use_jax = False):
@@ -30,7 +63,9 @@ class PeriodicKMeans(kmeans):
 
         """
         diff_wrapped = ((object1 - object2 if simple else object1[:, None, :] - object2[None, :, :]) + self.period_2) % self.period - self.period_2 # wrapping giving the smallest absolute difference in each coordinate
-        return numpy.sum(numpy.square(diff_wrapped), axis=-1) if not use_jax else jnp.sum(jnp.square(diff_wrapped), axis=-1)
+        if not use_jax: return numpy.sum(numpy.square(diff_wrapped), axis=-1)
+        from jax import numpy as jnp # imported on first use, JAX initialization is slow
+        return jnp.sum(jnp.square(diff_wrapped), axis=-1)
 
 
     def periodic_euclidean_distance_numpy(self, object1, object2, simple = True, use_jax = False):
@@ -46,7 +81,129 @@ class PeriodicKMeans(kmeans):
 
         """
         diff_wrapped = ((object1 - object2 if simple else object1[:, None, :] - object2[None, :, :]) + self.period_2) % self.period - self.period_2 # wrapping giving the smallest absolute difference in each coordinate
-        return numpy.sqrt(numpy.sum(numpy.square(diff_wrapped), axis=-1)) if not use_jax else jnp.sqrt(jnp.sum(jnp.square(diff_wrapped), axis=-1))
+        if not use_jax: return numpy.sqrt(numpy.sum(numpy.square(diff_wrapped), axis=-1))
+        from jax import numpy as jnp
+        return jnp.sqrt(jnp.sum(jnp.square(diff_wrapped), axis=-1))
+
+
+    def _get_workspace(self):
+        """!
+        @brief Return the workspace sized for the data and the centers, creating it on first use, or None if workspace is disabled.
+
+        """
+        if not self.use_workspace: return None
+        n_points, dimension = self._kmeans__pointer_data.shape
+        n_clusters = len(self._kmeans__centers)
+        if self._workspace is None or not self._workspace.fits(n_points, n_clusters, dimension):
+            self._workspace = PeriodicWorkspace(n_points, n_clusters, dimension, n_threads = self.n_threads)
+        return self._workspace
+
+
+    def _kmeans__update_clusters(self): # need to prepend parent class name to override this extra protected method
+        """!
+        @brief Assign each point to the closest center and group the point indices by cluster, dropping empty clusters.
+
+        @return (list) Updated clusters as list of arrays of indices of objects from data, in increasing order.
+
+        """
+        workspace = self._get_workspace()
+        dataset_differences = self._kmeans__calculate_dataset_difference(len(self._kmeans__centers))
+        labels = numpy.argmin(dataset_differences, axis = 0, out = None if workspace is None else workspace.labels)
+        counts = numpy.bincount(labels, minlength = len(self._kmeans__centers))
+        if not counts.all(): self._refill_empty_clusters(dataset_differences, labels, counts)
+        if workspace is None: narrow_labels = labels.astype(numpy.min_scalar_type(len(counts)))
+        else:
+            narrow_labels = workspace.narrow_labels
+            narrow_labels[...] = labels
+        order = numpy.argsort(narrow_labels, kind = "stable")
+        if self.lean and len(order) <= numpy.iinfo(numpy.uint32).max: order = order.astype(numpy.uint32)
+        if not counts.all(): # indices among the kept clusters
+            kept = (numpy.cumsum(counts > 0) - 1).astype(narrow_labels.dtype)
+            if workspace is None: narrow_labels = kept[labels]
+            else: numpy.take(kept, labels, out = narrow_labels)
+        self._labels = narrow_labels
+        return [cluster for cluster in numpy.split(order, numpy.cumsum(counts)[:-1]) if len(cluster) > 0]
+
+
+    def _point_distances(self, points, point):
+        # distances from points to one point, measured like those of _kmeans__calculate_dataset_difference
+        return self.periodic_euclidean_distance_square_numpy(points, point)
+
+
+    def _refill_empty_clusters(self, dataset_differences, labels, counts):
+        """!
+        @brief Give points to the clusters left empty by the assignment, updating labels and counts in place, according to the empty_clusters strategy.
+
+        @details Only the reseeded centers and the labels of the moved points change, the other distances are not recomputed. "farthest" moves to each empty cluster the point with the largest (weighted) distance to its center, read from the distances of the assignment, never taking the last point of a cluster. "split" moves to it the points of the currently largest cluster that are closer to its farthest point than to its center. The clusters that cannot be refilled, e.g. if all points coincide with the centers, are dropped.
+
+        """
+        empty = numpy.flatnonzero(counts == 0)
+        statistics = self._fit_statistics
+        statistics["empty_clusters"] = statistics.get("empty_clusters", 0) + len(empty)
+        reseeded = 0
+        if self.empty_clusters == "farthest":
+            scores = numpy.take_along_axis(dataset_differences, labels[None, :], axis = 0)[0] # distance of each point to its center
+            if self.weights is not None: scores = scores * self.weights
+            candidates = iter(numpy.argsort(-scores, kind = "stable")) # farthest first, each point is moved at most once
+            for index_cluster in empty:
+                index_point = next((index for index in candidates if scores[index] <= 0 or counts[labels[index]] > 1), None)
+                if index_point is None or scores[index_point] <= 0: break # only points on their centers are left
+                counts[labels[index_point]] -= 1
+                labels[index_point], counts[index_cluster] = index_cluster, 1
+                self._kmeans__centers[index_cluster] = self._kmeans__pointer_data[index_point]
+                reseeded += 1
+        elif self.empty_clusters == "split":
+            for index_cluster in empty:
+                largest = numpy.argmax(counts)
+                members = numpy.flatnonzero(labels == largest)
+                member_distances = dataset_differences[largest, members]
+                seed = members[numpy.argmax(member_distances)]
+                if member_distances.max() <= 0: break # all points of the largest cluster are on its center
+                moved = members[self._point_distances(self._kmeans__pointer_data[members], self._kmeans__pointer_data[seed]) < member_distances]
+                if len(moved) == len(members): moved = moved[moved != members[numpy.argmin(member_distances)]] # the closest point stays
+                labels[moved], counts[index_cluster] = index_cluster, len(moved)
+                counts[largest] -= len(moved)
+                self._kmeans__centers[index_cluster] = self._kmeans__pointer_data[seed]
+                reseeded += 1
+        statistics["reseeded_clusters"] = statistics.get("reseeded_clusters", 0) + reseeded
+        statistics["dropped_clusters"] = statistics.get("dropped_clusters", 0) + len(empty) - reseeded
+
+
+    def get_clusters(self):
+        """!
+        @brief Returns list of allocated clusters, each cluster contains indexes of objects in list of data.
+
+        @see get_cluster_indices(), get_labels() for the same information without Python lists
+
+        """
+        return [numpy.asarray(cluster).tolist() for cluster in self._kmeans__clusters]
+
+
+    def get_cluster_indices(self):
+        """!
+        @brief Returns the indices of the points of each cluster, in increasing order, as views of one permutation of the points sorted by cluster.
+
+        @details Unlike get_clusters(), nothing is copied; data[indices] gathers the points of a cluster when they are needed.
+
+        """
+        return list(self._kmeans__clusters)
+
+
+    def get_labels(self):
+        """!
+        @brief Returns the cluster of each point in the last assignment, in the smallest unsigned integer type that holds the number of clusters (the array held by the model, overwritten by a later process() with workspace).
+
+        """
+        return self._labels
+
+
+    def release_data(self):
+        """!
+        @brief Drop the references of the model to the training data and to the workspace, e.g. after process() when only the centers, the labels and the statistics are needed. process() cannot be called again.
+
+        """
+        self._kmeans__pointer_data = None
+        self._workspace = None
 
 
     def _kmeans__update_centers(self): # need to prepend parent class name to override this extra protected method
@@ -58,15 +215,146 @@ class PeriodicKMeans(kmeans):
         """
         
         dimension = self._kmeans__pointer_data.shape[1]
+        workspace = self._get_workspace()
+        if workspace is not None and self.weights is None and self.method == "exact" and not self.reproducible: # weighted, reproducible averages and the other methods are computed outside the workspace
+            centers = workspace.next_centers(len(self._kmeans__clusters))
+            period = numpy.broadcast_to(self.period, (dimension,))
+            for index in range(len(self._kmeans__clusters)): # one by one, as the clusters share the periodic average buffers of the workspace
+                for index_dimension in range(dimension):
+                    centers[index, index_dimension] = workspace.periodic_average(self._kmeans__pointer_data[:, index_dimension], self._kmeans__clusters[index], period[index_dimension])
+            return centers
+
         centers = numpy.zeros((len(self._kmeans__clusters), dimension))
-        
-        for index in range(len(self._kmeans__clusters)):
+
+        def update_center(index):
             cluster_points = self._kmeans__pointer_data[self._kmeans__clusters[index], :]
-            centers[index] = periodic_average_2d(cluster_points, axis = 0, period = self.period)
+            cluster_weights = None if self.weights is None else self.weights[self._kmeans__clusters[index]]
+            if cluster_weights is not None and not numpy.any(cluster_weights > 0): cluster_weights = None # points without weight only, averaged without weights
+            centers[index] = periodic_average_2d(cluster_points, axis = 0, weights = cluster_weights, period = self.period, method = self.method, reproducible = self.reproducible)
+
+        parallel_map(update_center, range(len(self._kmeans__clusters)), self.n_threads) # clusters are independent, each thread writes its own rows
 
         return numpy.array(centers)
 
 
+    def process(self):
+        """!
+        @brief Performs cluster analysis in line with rules of K-Means algorithm.
+
+        @return (PeriodicKMeans) Returns itself.
+
+        """
+        if self._kmeans__pointer_data is None: raise RuntimeError("The training data was released, see release_data()")
+        return super().process()
+
+
+    def _kmeans__process_by_python(self): # need to prepend parent class name to override this extra protected method
+        """!
+        @brief Performs cluster analysis using python code, as kmeans does, recording the fit statistics.
+
+        """
+        self._fit_statistics = {"iterations": 0, "converged": False, "max_change": float("inf"), "empty_clusters": 0, "reseeded_clusters": 0, "dropped_clusters": 0, "time_budget_exhausted": False, "previous_time": 0.0}
+        start_time = last_checkpoint_time = time.perf_counter()
+        maximum_change = float("inf")
+        iteration = 0
+        if self._resume_state is not None: # continue from a checkpoint, see resume()
+            iteration, maximum_change, self._kmeans__clusters = self._resume_state.pop("iteration"), self._resume_state.pop("max_change"), self._resume_state.pop("clusters")
+            self._fit_statistics.update(self._resume_state)
+            self._resume_state = None
+        first_iteration = iteration
+        iteration_time = 0.0
+
+        if self._kmeans__observer is not None:
+            initial_clusters = self._kmeans__update_clusters()
+            self._kmeans__observer.notify(initial_clusters, self._kmeans__centers.tolist())
+
+        while maximum_change > self._kmeans__tolerance and iteration < self._kmeans__itermax:
+            if self.time_budget is not None and iteration > first_iteration and time.perf_counter() - start_time + iteration_time > self.time_budget: # the next iteration, expected to last as long as the previous one, would not end in time
+                self._fit_statistics["time_budget_exhausted"] = True
+                break
+            iteration_start_time = time.perf_counter()
+            self._kmeans__clusters = self._kmeans__update_clusters()
+            updated_centers = self._kmeans__update_centers() # changes should be calculated before assignment
+
+            if self._kmeans__observer is not None:
+                self._kmeans__observer.notify(self._kmeans__clusters, updated_centers.tolist())
+
+            maximum_change = self._kmeans__calculate_changes(updated_centers)
+
+            self._kmeans__centers = updated_centers # assign center after change calculation
+            iteration += 1
+            iteration_time = time.perf_counter() - iteration_start_time
+            if self.checkpoint is not None and time.perf_counter() - last_checkpoint_time >= self.checkpoint_interval:
+                self.save_checkpoint(self.checkpoint, iteration, maximum_change, time.perf_counter() - start_time)
+                last_checkpoint_time = time.perf_counter()
+
+        self._kmeans__calculate_total_wce()
+        self._fit_statistics.update(iterations = iteration, converged = bool(maximum_change <= self._kmeans__tolerance), max_change = float(maximum_change), total_wce = self._kmeans__total_wce, time = time.perf_counter() - start_time)
+        if self.checkpoint is not None: self.save_checkpoint(self.checkpoint, iteration, maximum_change, self._fit_statistics["time"])
+        if not self.keep_data: self.release_data()
+
+
+    def save_checkpoint(self, file, iteration, maximum_change, elapsed = 0.0):
+        """!
+        @brief Save the state of the fit after an iteration: the centers, the label of each point in the last assignment (in the smallest integer type) and the iteration counters, without the data.
+
+        @details The archive is written next to file and then renamed over it, so an interrupted write leaves the previous checkpoint intact.
+
+        @param[in] file (str or path): Path of the uncompressed .npz archive.
+        @param[in] iteration (uint): Number of completed iterations.
+        @param[in] maximum_change (double): Square change of the centers in the last iteration.
+        @param[in] elapsed (double): Fit time in seconds of the current call of process().
+
+        """
+        centers = numpy.asarray(self._kmeans__centers, dtype = numpy.float64)
+        labels = numpy.zeros(len(self._kmeans__pointer_data), dtype = numpy.min_scalar_type(max(len(centers) - 1, 0)))
+        for index_cluster, cluster in enumerate(self._kmeans__clusters): labels[cluster] = index_cluster
+        statistics = self._fit_statistics
+        temporary_file = f"{file}.tmp"
+        with open(temporary_file, "wb") as output: # a file object, so that numpy does not append .npz to the name
+            numpy.savez(output, format_version = numpy.array(CHECKPOINT_FORMAT_VERSION), centers = centers, labels = labels, period = numpy.asarray(self.period, dtype = numpy.float64),
+                        iteration = numpy.array(iteration), max_change = numpy.array(maximum_change, dtype = numpy.float64), time = numpy.array(statistics.get("previous_time", 0.0) + elapsed),
+                        counters = numpy.array([statistics.get(name, 0) for name in ("empty_clusters", "reseeded_clusters", "dropped_clusters")]))
+        os.replace(temporary_file, file)
+
+
+    @classmethod
+    def resume(cls, file, data, **kwargs):
+        """!
+        @brief Continue a fit from a checkpoint saved by process(), e.g. after the time budget was exhausted or the job was interrupted.
+
+        @param[in] file (str or path): Checkpoint archive.
+        @param[in] data (array_like): The data of the checkpointed fit.
+        @param[in] **kwargs: Arguments of the constructor other than initial_centers, e.g. weights, time_budget or itermax (which counts the checkpointed iterations too); the period defaults to the checkpointed one and the checkpoint to file.
+
+        @return (PeriodicKMeans) The processed model.
+
+        """
+        with numpy.load(file, allow_pickle = False) as archive:
+            if "format_version" not in archive.files or int(archive["format_version"]) > CHECKPOINT_FORMAT_VERSION: raise ValueError("Unsupported checkpoint file format")
+            centers, labels, period = archive["centers"], archive["labels"], archive["period"]
+            iteration, maximum_change, previous_time, counters = int(archive["iteration"]), float(archive["max_change"]), float(archive["time"]), archive["counters"].tolist()
+        if len(labels) != len(data): raise ValueError("data must have as many points as the checkpointed fit")
+        kwargs.setdefault("period", float(period) if period.ndim == 0 else period)
+        kwargs.setdefault("checkpoint", file)
+        model = cls(data, initial_centers = centers, **kwargs)
+        order = numpy.argsort(labels, kind = "stable")
+        clusters = [cluster for cluster in numpy.split(order, numpy.cumsum(numpy.bincount(labels, minlength = len(centers)))[:-1]) if len(cluster) > 0]
+        model._labels = labels
+        model._resume_state = dict(zip(("empty_clusters", "reseeded_clusters", "dropped_clusters"), counters), iteration = iteration, max_change = maximum_change, clusters = clusters, previous_time = previous_time)
+        return model.process()
+
+
+    def get_fit_statistics(self):
+        """!
+        @brief Statistics of the last call of process().
+
+        @return (dict) Number of iterations (including those of a resumed checkpoint), whether the last change of the centers was within tolerance, that change, the number of times a cluster was found empty after an assignment, how many of those were reseeded and dropped (see empty_clusters), whether the time budget stopped the fit, the total within-cluster error, the fit time in seconds of this call and that of the checkpointed calls before it.
+
+        """
+        return dict(self._fit_statistics)
+
+
     def predict(self, points):
         """!
         @brief Calculates the closest cluster to each point.
@@ -78,6 +366,8 @@ class PeriodicKMeans(kmeans):
 
         """
 
+        from jax import numpy as jnp
+
         nppoints = jnp.array(points)
         if len(self._kmeans__clusters) == 0:
             return []
@@ -92,7 +382,24 @@ class PeriodicKMeans(kmeans):
         @brief Calculate distance from each point to each cluster center.
 
         """
-        return self.periodic_euclidean_distance_square_numpy(self._kmeans__centers[:amount_clusters], self._kmeans__pointer_data, simple = False)
+        if (workspace := self._get_workspace()) is not None: return workspace.distances_square(self._kmeans__centers[:amount_clusters], self._kmeans__pointer_data, self.period)
+        return parallel_periodic_distance_square(self._kmeans__centers[:amount_clusters], self._kmeans__pointer_data, self.period, n_threads = self.n_threads) # by blocks in every mode, as DistributedPeriodicKMeans, so that ties are broken alike
+
+
+    def _kmeans__calculate_total_wce(self): # need to prepend parent class name to override this extra protected method
+        """!
+        @brief Calculate total within cluster errors, weighted by the weights of the points if given, summed exactly if reproducible.
+
+        """
+        dataset_differences = self._kmeans__calculate_dataset_difference(len(self._kmeans__clusters))
+        self._kmeans__total_wce = 0.0
+        exact_total_wce = 0
+        for index_cluster, cluster in enumerate(self._kmeans__clusters):
+            cluster_differences = dataset_differences[index_cluster][cluster]
+            if self.weights is not None: cluster_differences = self.weights[cluster] * cluster_differences
+            if self.reproducible: exact_total_wce += exact_sum(cluster_differences)
+            else: self._kmeans__total_wce += float(numpy.sum(cluster_differences))
+        if self.reproducible: self._kmeans__total_wce = to_float(exact_total_wce)
 
 
     def _kmeans__calculate_changes(self, updated_centers): # need to prepend parent class name to override this extra protected method
@@ -110,4 +417,27 @@ class PeriodicKMeans(kmeans):
             changes = self.periodic_euclidean_distance_square_numpy(self._kmeans__centers, updated_centers)
             maximum_change = numpy.max(changes)
 
-        return maximum_change
\ No newline at end of file
+        return maximum_change
+
+
+    def save(self, file, dtype = None, index = None):
+        """!
+        @brief Save an inference-only artifact of the model (centers and periods, without the training data).
+
+        @param[in] file (str or path): Path to the uncompressed .npz archive to write.
+        @param[in] dtype (numpy.dtype): Optional dtype to store the centers with, e.g. numpy.float32.
+        @param[in] index (dict): Optional named arrays (index structures) to store alongside the centers.
+
+        @see PeriodicKMeansPredictor.load()
+
+        """
+        PeriodicKMeansPredictor.from_model(self, dtype = dtype, index = index).save(file)
+
+
+    @staticmethod
+    def load(file, mmap_mode = "r"):
+        """!
+        @brief Load an artifact written by save() as a PeriodicKMeansPredictor, which does not require pyclustering or JAX.
+
+        """
+        return PeriodicKMeansPredictor.load(file, mmap_mode = mmap_mode)
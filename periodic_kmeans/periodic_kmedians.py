@@ -0,0 +1,78 @@
+import numpy
+
+from .parallel import parallel_periodic_manhattan_distance
+from .periodic_kmeans import PeriodicKMeans
+from .periodic_median import periodic_median_2d
+
+
+class PeriodicKMedians(PeriodicKMeans):
+    """!
+    @brief K-medians with periodic boundary conditions, robust to outliers.
+
+    @details Points are assigned by the periodic Manhattan distance (the sum of the wrapped absolute differences over dimensions) and each center is updated to the per-dimension circular median of its cluster, which minimizes that distance.
+
+    """
+
+    def periodic_manhattan_distance_numpy(self, object1, object2, simple = True):
+        """!
+        @brief Calculate Manhattan distance with periodicity between two objects using numpy.
+
+        @param[in] object1 (array_like): The first array_like object.
+        @param[in] object2 (array_like): The second array_like object.
+        @param[in] simple (boolean): If False, compute the full distance matrix between all pairs in two sets of points.
+
+        @return (double) Manhattan distance between two objects.
+
+        """
+        diff_wrapped = ((object1 - object2 if simple else object1[:, None, :] - object2[None, :, :]) + self.period_2) % self.period - self.period_2 # wrapping giving the smallest absolute difference in each coordinate
+        return numpy.sum(numpy.abs(diff_wrapped), axis=-1)
+
+
+    def _kmeans__update_centers(self): # need to prepend parent class name to override this extra protected method
+        """!
+        @brief Calculate centers of clusters as the per-dimension circular medians of contained objects, weighted if weights were given.
+
+        @return (numpy.array) Updated centers.
+
+        """
+
+        dimension = self._kmeans__pointer_data.shape[1]
+        centers = numpy.zeros((len(self._kmeans__clusters), dimension))
+
+        for index in range(len(self._kmeans__clusters)):
+            cluster_points = self._kmeans__pointer_data[self._kmeans__clusters[index], :]
+            cluster_weights = None if self.weights is None else self.weights[self._kmeans__clusters[index]]
+            if cluster_weights is not None and not numpy.any(cluster_weights > 0): cluster_weights = None # points without weight only, median without weights
+            centers[index] = periodic_median_2d(cluster_points, axis = 0, weights = cluster_weights, period = self.period)
+
+        return numpy.array(centers)
+
+
+    def _kmeans__calculate_dataset_difference(self, amount_clusters): # need to prepend parent class name to override this extra protected method
+        """!
+        @brief Calculate periodic Manhattan distance from each point to each cluster center.
+
+        """
+        if (workspace := self._get_workspace()) is not None: return workspace.distances_manhattan(self._kmeans__centers[:amount_clusters], self._kmeans__pointer_data, self.period)
+        return parallel_periodic_manhattan_distance(self._kmeans__centers[:amount_clusters], self._kmeans__pointer_data, self.period, n_threads = self.n_threads) # by blocks in every mode, as in PeriodicKMeans
+
+
+    def _point_distances(self, points, point):
+        return self.periodic_manhattan_distance_numpy(points, point)
+
+
+    def predict(self, points):
+        """!
+        @brief Calculates the closest cluster to each point by the periodic Manhattan distance.
+
+        @param[in] points (array_like): Points for which closest clusters are calculated.
+
+        @return (numpy.array) Index of the closest cluster for each point. Return empty collection if 'process()' method was not called.
+
+        """
+        if len(self._kmeans__clusters) == 0:
+            return []
+
+        differences = self.periodic_manhattan_distance_numpy(numpy.asarray(points), self._kmeans__centers, simple = False)
+
+        return numpy.argmin(differences, axis=1)
@@ -0,0 +1,146 @@
+import numpy as np
+
+from .periodic_distance import periodic_distance_square
+
+
+class PeriodicKMedoids:
+    """!
+    @brief K-medoids with periodic boundary conditions using FastPAM-style swaps.
+
+    @details The medoids are data points minimizing the total periodic Euclidean distance of the points to their closest medoid. Caching the closest and the second closest medoid of every point gives the cost changes of swapping a candidate with each of the k medoids in one O(N) pass (FastPAM1), and the best swap of each block of candidates is applied at once, as in FasterPAM.
+
+    """
+
+    def __init__(self, data, period = 1, no_of_clusters = None, initial_medoids = None, itermax = 100, n_candidates = None, chunk_size = 2**22, random_state = None):
+        """!
+        @param[in] data (array_like): Data of shape (N, D).
+        @param[in] period (float or array_like): Period, common or per dimension.
+        @param[in] no_of_clusters (uint): Number of clusters, required unless initial_medoids are given.
+        @param[in] initial_medoids (array_like): Optional indices of the initial medoids in data, chosen by k-means++ style sampling otherwise.
+        @param[in] itermax (uint): Maximum number of sweeps over the candidates.
+        @param[in] n_candidates (uint): Number of randomly chosen non-medoid points tried in each sweep, all of them by default.
+        @param[in] chunk_size (uint): Number of distances held in memory at once, which determines the size of the candidate blocks.
+        @param[in] random_state (int): Seed for the initialization and the choice of candidates.
+
+        """
+        self.__pointer_data = np.asarray(data, dtype = np.float64)
+        if self.__pointer_data.ndim != 2: raise ValueError("data must be a two-dimensional array")
+        if len(self.__pointer_data) == 0: raise ValueError("Input data is empty")
+        self.period = np.broadcast_to(np.asarray(period, dtype = np.float64), self.__pointer_data.shape[1:])
+        self.__itermax = itermax
+        self.__n_candidates = n_candidates
+        self.__chunk_size = chunk_size
+        self.__rng = np.random.default_rng(random_state)
+
+        if initial_medoids is None:
+            if no_of_clusters is None or no_of_clusters <= 0: raise ValueError("no_of_clusters must be positive when initial_medoids are not given")
+            if no_of_clusters > len(self.__pointer_data): raise ValueError("no_of_clusters must not exceed the number of points")
+            initial_medoids = self.__initialize(no_of_clusters)
+        self.__medoids = np.array(initial_medoids, dtype = np.intp)
+        if len(np.unique(self.__medoids)) != len(self.__medoids): raise ValueError("initial_medoids must be distinct")
+        self.__nearest = np.empty(0, dtype = np.intp)
+        self.__total_deviation = 0.0
+
+
+    def periodic_euclidean_distance_numpy(self, object1, object2, simple = True):
+        return np.sqrt(periodic_distance_square(object1, object2, self.period, simple = simple))
+
+
+    def __initialize(self, no_of_clusters):
+        # k-means++ style sampling of distinct points, proportional to the distance to the closest medoid chosen so far
+        medoids = [int(self.__rng.integers(len(self.__pointer_data)))]
+        min_distances = self.periodic_euclidean_distance_numpy(self.__pointer_data, self.__pointer_data[medoids[0]])
+        for _ in range(1, no_of_clusters):
+            cumulative = np.cumsum(min_distances)
+            if cumulative[-1] > 0: index_point = min(int(np.searchsorted(cumulative, self.__rng.random() * cumulative[-1], side = "right")), len(cumulative) - 1)
+            else: index_point = int(self.__rng.choice(np.setdiff1d(np.arange(len(self.__pointer_data)), medoids))) # all points coincide with the medoids
+            medoids.append(index_point)
+            np.minimum(min_distances, self.periodic_euclidean_distance_numpy(self.__pointer_data, self.__pointer_data[index_point]), out = min_distances)
+        return medoids
+
+
+    def __update_caches(self):
+        # closest medoid, distance to it and to the second closest medoid for every point
+        distances = np.empty((len(self.__pointer_data), len(self.__medoids)))
+        block = max(1, self.__chunk_size // max(len(self.__medoids), 1))
+        for start in range(0, len(self.__pointer_data), block):
+            distances[start:start + block] = self.periodic_euclidean_distance_numpy(self.__pointer_data[start:start + block], self.__pointer_data[self.__medoids], simple = False)
+        distances[self.__medoids, np.arange(len(self.__medoids))] = 0 # exact zero for the medoids themselves
+        self.__nearest = np.argmin(distances, axis = 1)
+        self.__nearest_distances = distances[np.arange(len(distances)), self.__nearest]
+        self.__membership = np.zeros(distances.shape) # one-hot closest medoid, to sum per medoid with a matrix product
+        self.__membership[np.arange(len(distances)), self.__nearest] = 1
+        if len(self.__medoids) > 1:
+            distances[np.arange(len(distances)), self.__nearest] = np.inf
+            self.__second_distances = np.min(distances, axis = 1)
+        else: self.__second_distances = np.full(len(distances), np.inf)
+
+
+    def __swap_deltas(self, candidates):
+        # change of the total deviation when each candidate replaces each medoid, shape (len(candidates), k)
+        distances = self.periodic_euclidean_distance_numpy(self.__pointer_data[candidates], self.__pointer_data, simple = False)
+        gains = np.minimum(distances - self.__nearest_distances, 0) # points closer to the candidate than to their current medoid, whichever medoid is removed
+        shared = gains.sum(axis = 1)
+        # points whose closest medoid is removed go to the candidate or to their second closest medoid instead, their gain was already counted above
+        removal = np.minimum(distances, self.__second_distances) - self.__nearest_distances - gains
+        return shared[:, None] + removal @ self.__membership
+
+
+    def process(self):
+        """!
+        @brief Performs cluster analysis by swapping medoids with non-medoid points while the total deviation decreases.
+
+        @return (PeriodicKMedoids) Returns itself.
+
+        """
+        self.__update_caches()
+        block = max(1, self.__chunk_size // len(self.__pointer_data))
+        tolerance = 1e-12 * max(float(self.__nearest_distances.sum()), 1.0) # ignore swaps that only improve by rounding
+        for _ in range(self.__itermax):
+            swapped = False
+            candidates = self.__rng.permutation(np.setdiff1d(np.arange(len(self.__pointer_data)), self.__medoids))
+            if self.__n_candidates is not None: candidates = candidates[:self.__n_candidates]
+            for start in range(0, len(candidates), block):
+                block_candidates = candidates[start:start + block]
+                block_candidates = block_candidates[~np.isin(block_candidates, self.__medoids)] # earlier swaps may have turned candidates into medoids
+                if len(block_candidates) == 0: continue
+                deltas = self.__swap_deltas(block_candidates)
+                index_candidate, index_medoid = np.unravel_index(np.argmin(deltas), deltas.shape)
+                if deltas[index_candidate, index_medoid] < -tolerance:
+                    self.__medoids[index_medoid] = block_candidates[index_candidate]
+                    self.__update_caches()
+                    swapped = True
+            if not swapped: break
+
+        self.__total_deviation = float(self.__nearest_distances.sum())
+        return self
+
+
+    def predict(self, points):
+        """!
+        @brief Calculates the closest medoid to each point.
+
+        @param[in] points (array_like): Points for which closest clusters are calculated.
+
+        @return (numpy.array) Index of the closest cluster for each point.
+
+        """
+        return np.argmin(self.periodic_euclidean_distance_numpy(np.asarray(points), self.__pointer_data[self.__medoids], simple = False), axis = 1)
+
+
+    def get_medoids(self):
+        return self.__medoids.tolist()
+
+
+    def get_centers(self):
+        return self.__pointer_data[self.__medoids].tolist()
+
+
+    def get_clusters(self):
+        if len(self.__nearest) == 0: return []
+        order = np.argsort(self.__nearest, kind = "stable")
+        return [cluster.tolist() for cluster in np.split(order, np.cumsum(np.bincount(self.__nearest, minlength = len(self.__medoids)))[:-1])]
+
+
+    def get_total_deviation(self):
+        return self.__total_deviation
@@ -0,0 +1,35 @@
+import numpy as np
+from typing import Literal
+
+from .periodic_distance import circular_distance_sums
+
+
+def periodic_median_1d(a: np.ndarray[float], weights: np.ndarray[float] | None = None, period: float = 1):
+    if a.ndim != 1: raise ValueError("a must be a one-dimensional ndarray")
+
+    if weights is None: weights = np.ones_like(a) # equal weights by default, the number does not matter
+    if weights.ndim != 1: raise ValueError("weights must be a one-dimensional ndarray")
+    if weights.shape != a.shape: raise ValueError("weights must have the same length as a")
+    if weights.sum() <= 0: raise ValueError("Sum of weights must be positive")
+    if np.any(weights < 0): raise ValueError("weights must not be negative")
+
+    # the weighted sum of periodic absolute deviations is piecewise linear in the median, its kinks at the antipodes of the elements are maxima, so the minimum is attained at one of the elements
+    a = a % period
+    candidates = np.unique(a) # sorted, repeating elements only need to be tried once
+    # the sums of deviations for all candidates at once, in O(n log n) via prefix sums over the sorted elements around the circle
+    return candidates[np.argmin(circular_distance_sums(candidates, a, period = period, weights = weights))]
+
+
+def periodic_median_2d(a: np.ndarray[float], axis: Literal[-2, -1, 0, 1] = 0, weights: np.ndarray[float] | None = None, period: float | np.ndarray[float] = 1):
+    if a.ndim != 2: raise ValueError("a must be a two-dimensional ndarray")
+
+    if axis > 1 or axis < -2: raise ValueError("Illegal axis for a two-dimensional ndarray")
+    axis = (axis + 2) % 2 # turn negative axis to 0 or 1, so that the other axis is `not axis`
+    if axis: a = a.T # if axis = 1 (or equivalently -1 originally), swap the axes
+
+    if np.shape(period) == tuple(): period = np.repeat(period, a.shape[1])
+    period = np.asarray(period)
+    if period.ndim != 1: raise ValueError("period must be a one-dimensional ndarray")
+    if len(period) != a.shape[1]: raise ValueError("period must have the same length as a along the other axis")
+
+    return np.array([periodic_median_1d(a[:, i], weights = weights, period = period[i]) for i in range(a.shape[1])])
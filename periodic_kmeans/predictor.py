@@ -0,0 +1,116 @@
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+from .periodic_distance import nearest_centers
+
+
+FORMAT_VERSION = 1
+_INDEX_PREFIX = "index_"
+
+
+def _npz_path(file):
+    # np.savez appends .npz to paths without that suffix, so save() and load() both use the suffixed path
+    if not isinstance(file, (str, os.PathLike)): return file # an open file object
+    file = os.fspath(file)
+    return file if file.endswith(".npz") else file + ".npz"
+
+
+def _load_npz(file, mmap_mode: str | None = "r"):
+    """!
+    @brief Load all arrays from an uncompressed .npz archive, memory-mapping them in place when possible.
+
+    @details np.load ignores mmap_mode for .npz archives, but the members written by np.savez are stored without compression, so every array is a plain .npy file at a fixed offset inside the archive.
+
+    """
+    if mmap_mode is None or not isinstance(file, (str, os.PathLike)): # open file objects are read into memory
+        with np.load(file, allow_pickle = False) as archive:
+            return {name: archive[name] for name in archive.files}
+
+    arrays = {}
+    with zipfile.ZipFile(file) as archive, open(file, "rb") as raw:
+        for info in archive.infolist():
+            if not info.filename.endswith(".npy"): continue
+            if info.compress_type != zipfile.ZIP_STORED: raise ValueError("Cannot memory-map a compressed archive member, load with mmap_mode = None")
+            raw.seek(info.header_offset)
+            local_header = raw.read(30) # fixed part of the zip local file header, the variable-length name and extra fields follow
+            name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+            raw.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(raw)
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(raw) if version == (1, 0) else np.lib.format.read_array_header_2_0(raw)
+            if dtype.hasobject: raise ValueError("Object arrays are not supported")
+            name = info.filename[:-len(".npy")]
+            if np.prod(shape) == 0: arrays[name] = np.empty(shape, dtype = dtype) # np.memmap refuses empty mappings
+            else: arrays[name] = np.memmap(file, dtype = dtype, mode = mmap_mode, offset = raw.tell(), shape = shape, order = "F" if fortran_order else "C")
+    return arrays
+
+
+class PeriodicKMeansPredictor:
+    """!
+    @brief Inference-only periodic k-means model holding only the cluster centers and the periods.
+
+    @details Depends on numpy only, so it can be imported and loaded without pyclustering and JAX. Optional index structures (arbitrary named arrays) can be stored alongside the centers.
+
+    """
+
+    def __init__(self, centers, period = 1, index = None):
+        self.centers = np.asarray(centers)
+        if self.centers.ndim != 2: raise ValueError("centers must be a two-dimensional array")
+        self.period = np.broadcast_to(np.asarray(period, dtype = np.float64), self.centers.shape[1:]).copy()
+        self.index = dict(index) if index is not None else {}
+
+
+    @classmethod
+    def from_model(cls, model, dtype = None, index = None):
+        """!
+        @brief Create a predictor from a processed PeriodicKMeans instance.
+
+        @param[in] model (PeriodicKMeans): Processed model.
+        @param[in] dtype (numpy.dtype): Optional dtype to store the centers with, e.g. numpy.float32 to halve the size.
+        @param[in] index (dict): Optional named arrays to keep with the centers.
+
+        """
+        return cls(np.asarray(model.get_centers(), dtype = dtype), period = model.period, index = index)
+
+
+    def get_centers(self):
+        return self.centers.tolist()
+
+
+    def predict(self, points, chunk_size = 65536):
+        """!
+        @brief Calculates the closest cluster to each point.
+
+        @param[in] points (array_like): Points for which closest clusters are calculated.
+        @param[in] chunk_size (uint): Number of points handled at once.
+
+        @return (numpy.array) Index of the closest cluster for each point.
+
+        """
+        return nearest_centers(np.asarray(points), self.centers, self.period, chunk_size = chunk_size)[0]
+
+
+    def save(self, file):
+        """!
+        @brief Save the model to an uncompressed .npz archive that can be memory-mapped by load(), ".npz" is appended to a path without it.
+
+        """
+        np.savez(_npz_path(file), format_version = np.array(FORMAT_VERSION), centers = np.ascontiguousarray(self.centers), period = self.period,
+                 **{_INDEX_PREFIX + name: np.ascontiguousarray(array) for name, array in self.index.items()})
+
+
+    @classmethod
+    def load(cls, file, mmap_mode = "r"):
+        """!
+        @brief Load a model saved by save() or PeriodicKMeans.save().
+
+        @param[in] file (str, path or file): Path to the .npz archive, ".npz" is appended if missing, as by save(); or an open binary file, read into memory.
+        @param[in] mmap_mode (str): Memory-mapping mode for the arrays of a path (see numpy.memmap), None to read them into memory.
+
+        """
+        arrays = _load_npz(_npz_path(file), mmap_mode = mmap_mode)
+        if "format_version" not in arrays or int(arrays["format_version"]) > FORMAT_VERSION: raise ValueError("Unsupported model file format")
+        index = {name[len(_INDEX_PREFIX):]: array for name, array in arrays.items() if name.startswith(_INDEX_PREFIX)}
+        return cls(arrays["centers"], period = np.array(arrays["period"]), index = index)
@@ -0,0 +1,95 @@
+from fractions import Fraction
+
+import numpy as np
+
+
+SCALE_BITS = 1126 # every finite float64 is an integer (its 53-bit mantissa, shifted) times 2**-SCALE_BITS
+_SHIFT_LIMIT = 4096 # exceeds the largest shift, 1024 - 53 + SCALE_BITS
+_LOW_BITS = 26 # mantissas are summed in two halves, so that int64 sums stay exact up to 2**36 values
+
+
+def exact_sums(values: np.ndarray[float], segments: np.ndarray[int] | None = None, n_segments: int = 1):
+    """!
+    @brief Exact sums of finite values, per segment, as integers in units of 2**-SCALE_BITS.
+
+    @details Each value is split into its integer mantissa and exponent, the mantissas are summed exactly in int64 per (segment, exponent) and combined as Python integers. The result does not depend on the order of the values, so sums computed by chunks, threads or shards and added together are equal to the sum of all the values at once.
+
+    @param[in] values (array_like): Finite values.
+    @param[in] segments (array_like): Optional segment of each value in [0, n_segments), all values are in segment 0 by default.
+    @param[in] n_segments (uint): Number of segments.
+
+    @return (list) Exact sum of each segment, Python integers.
+
+    """
+    values = np.asarray(values, dtype = np.float64).ravel()
+    if not np.all(np.isfinite(values)): raise ValueError("values must be finite")
+    if len(values) == 0: return [0] * n_segments
+    mantissas, exponents = np.frexp(values)
+    integers = (mantissas * 2.0**53).astype(np.int64) # exact
+    keys = exponents.astype(np.int64) + (SCALE_BITS - 53) # value = integer * 2**(key - SCALE_BITS), with key >= 0
+    if segments is not None: keys += np.asarray(segments, dtype = np.int64).ravel() * _SHIFT_LIMIT
+    order = np.argsort(keys.astype(np.min_scalar_type(n_segments * _SHIFT_LIMIT)), kind = "stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    integers = integers[order]
+    high_sums = np.add.reduceat(integers >> _LOW_BITS, starts).tolist()
+    low_sums = np.add.reduceat(integers & ((1 << _LOW_BITS) - 1), starts).tolist()
+    sums = [0] * n_segments
+    for key, high_sum, low_sum in zip(keys[starts].tolist(), high_sums, low_sums):
+        segment, shift = divmod(key, _SHIFT_LIMIT)
+        sums[segment] += ((high_sum << _LOW_BITS) + low_sum) << shift
+    return sums
+
+
+def exact_sum(values: np.ndarray[float]):
+    return exact_sums(values)[0]
+
+
+def to_float(fixed: int):
+    """!
+    @brief Correctly rounded float of an exact sum returned by exact_sums.
+
+    """
+    return fixed / (1 << SCALE_BITS) # true division of Python integers is correctly rounded
+
+
+def to_fraction(fixed: int):
+    return Fraction(fixed, 1 << SCALE_BITS)
+
+
+def reproducible_sum(values: np.ndarray[float]):
+    """!
+    @brief Correctly rounded sum of finite values, bitwise independent of their order.
+
+    """
+    return to_float(exact_sum(values))
+
+
+def screening_margin(n: int, total_weight: float, period: float):
+    """!
+    @brief Bound on the rounding error of the float least-squares objectives of periodic averages.
+
+    @details The objectives 2 P S + P^2 M - (A + P M)^2 / W of n values in [0, P) with total weight W, evaluated from float prefix sums, are within this margin of their exact values, so every threshold whose float objective exceeds the minimum by more than the margin is certainly not the best one.
+
+    """
+    return 32 * (n + 4) * np.finfo(np.float64).eps * period**2 * total_weight
+
+
+def exact_best_average(candidates, total_weight, total_sum, period: float):
+    """!
+    @brief The least-squares periodic average among candidate wrappings, compared in exact rational arithmetic.
+
+    @param[in] candidates (iterable): Pairs (shifted weight, shifted weighted sum) of exact Fractions, for the values below each candidate threshold shifted by a period.
+    @param[in] total_weight (Fraction): Exact total weight.
+    @param[in] total_sum (Fraction): Exact total weighted sum.
+    @param[in] period (float): Period.
+
+    @return (float) Correctly rounded average of the best candidate in [0, period), ties going to the smallest shifted weight.
+
+    """
+    period_fraction = Fraction(float(period)) # also for numpy integers, whose Fractions overflow
+    best = None
+    for shifted_weight, shifted_sum in candidates:
+        objective = 2 * period_fraction * shifted_sum + period_fraction**2 * shifted_weight - (total_sum + period_fraction * shifted_weight)**2 / total_weight
+        if best is None or (objective, shifted_weight) < best: best = (objective, shifted_weight)
+    return float(((total_sum + period_fraction * best[1]) / total_weight) % period_fraction) % period # the rounding may reach the period
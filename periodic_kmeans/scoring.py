@@ -0,0 +1,116 @@
+import numpy as np
+
+from .parallel import parallel_map, periodic_distance_square_block, resolve_n_threads
+from .periodic_distance import periodic_difference, periodic_distance_square
+from .predictor import PeriodicKMeansPredictor
+
+
+_PRUNING_SLACK = 1e-9 # a center is discarded only if it is farther than the best one by more than the rounding of the bounds, relative to them and to the square period
+
+
+def _block_arcs(block: np.ndarray[float], period: np.ndarray[float]):
+    # per dimension, an arc [start, start + length] of the circle holding all the wrapped coordinates of the block: the range of the values or of the values turned by half a period, whichever is shorter
+    values = block % period
+    turned = (values + period / 2) % period
+    low, high = values.min(axis = 0), values.max(axis = 0)
+    turned_low, turned_high = turned.min(axis = 0), turned.max(axis = 0)
+    use_turned = turned_high - turned_low < high - low # e.g. values on both sides of 0
+    start = np.where(use_turned, (turned_low - period / 2) % period, low)
+    length = np.where(use_turned, turned_high - turned_low, high - low)
+    return start, length
+
+
+def _arc_bounds(centers: np.ndarray[float], start: np.ndarray[float], length: np.ndarray[float], period: np.ndarray[float]):
+    # smallest and largest square periodic distances from each center to any point whose coordinates lie in the arcs
+    offset = (centers - start) % period # position of the center along the circle, from the start of the arc
+    outside = np.maximum(np.minimum(offset - length, period - offset), 0) # 0 inside the arc, else the distance to its closer end
+    antipode = (offset + period / 2) % period
+    farthest = np.where(antipode <= length, period / 2, np.maximum(np.abs(periodic_difference(offset, 0, period)), np.abs(periodic_difference(offset, length, period))))
+    return np.sum(outside**2, axis = 1), np.sum(farthest**2, axis = 1)
+
+
+class PrunedNearestCenters:
+    """!
+    @brief Closest-center lookup for very large batches of points against fixed centers, skipping the centers that cannot be the closest to any point of a block.
+
+    @details Each block of points is enclosed in a box of arcs on the torus, which bounds the distance from every center to the block. The centers that cannot be the closest to any point of the block, by these bounds or by the triangle inequality around the best center, are skipped. The labels are those of PeriodicKMeansPredictor.predict, except for points whose closest centers are tied up to rounding. Blocks of nearby points are pruned the most.
+
+    """
+
+    def __init__(self, model, block_size = 4096, n_threads = 1):
+        """!
+        @param[in] model (object): PeriodicKMeansPredictor, or a processed model providing get_centers() and period.
+        @param[in] block_size (uint): Number of points sharing a box, the temporary memory is proportional to block_size * k * D per thread.
+        @param[in] n_threads (uint): Threads processing blocks concurrently, None to read PERIODIC_KMEANS_NUM_THREADS.
+
+        """
+        if block_size <= 0: raise ValueError("block_size must be positive")
+        predictor = model if isinstance(model, PeriodicKMeansPredictor) else PeriodicKMeansPredictor.from_model(model)
+        self.centers = np.asarray(predictor.centers, dtype = np.float64)
+        self.period = predictor.period
+        self.block_size = block_size
+        self.n_threads = resolve_n_threads(n_threads)
+        self.center_distances = np.sqrt(periodic_distance_square(self.centers, self.centers, self.period, simple = False))
+        self.label_dtype = np.int16 if len(self.centers) <= np.iinfo(np.int16).max + 1 else np.int32
+        self.__n_candidates = 0
+        self.__n_blocks = 0
+
+
+    def candidates(self, block):
+        """!
+        @brief Indices, in increasing order, of the centers that may be the closest to some point of the block.
+
+        """
+        start, length = _block_arcs(block, self.period)
+        lower_bounds, upper_bounds = _arc_bounds(self.centers, start, length, self.period)
+        best = np.argmin(upper_bounds)
+        radius = upper_bounds[best] + _PRUNING_SLACK * (upper_bounds[best] + np.sum(self.period**2))
+        kept = (lower_bounds <= radius) & (self.center_distances[best] <= 2 * np.sqrt(radius))
+        return np.flatnonzero(kept)
+
+
+    def predict_block(self, block):
+        """!
+        @brief Index of the closest center for each point of a block of shape (n, D).
+
+        """
+        block = np.asarray(block)
+        if len(block) == 0: return np.empty(0, dtype = self.label_dtype)
+        candidates = self.candidates(block)
+        self.__n_candidates += len(candidates) # counters only, a race between threads may lose an update
+        self.__n_blocks += 1
+        distances = np.empty((len(candidates), len(block)))
+        periodic_distance_square_block(self.centers[candidates], block, self.period, distances, np.empty_like(distances))
+        return candidates[np.argmin(distances, axis = 0)].astype(self.label_dtype)
+
+
+    def predict(self, points, out = None):
+        """!
+        @brief Stream points through the lookup block by block, writing the labels to an output array.
+
+        @param[in] points (array_like or str): Points of shape (N, D), e.g. a numpy.memmap, or the path of a .npy file, which is memory-mapped.
+        @param[in] out (array_like or str): Optional output of shape (N,) with an integer dtype, or the path of a .npy file to create as a memory-mapped array of label_dtype (int16, or int32 for more than 32768 centers).
+
+        @return (numpy.array) The labels, out if given.
+
+        """
+        if isinstance(points, str): points = np.load(points, mmap_mode = "r")
+        if points.ndim != 2 or points.shape[1] != self.centers.shape[1]: raise ValueError(f"points must have shape (N, {self.centers.shape[1]})")
+        if out is None: out = np.empty(len(points), dtype = self.label_dtype)
+        elif isinstance(out, str): out = np.lib.format.open_memmap(out, mode = "w+", dtype = self.label_dtype, shape = (len(points),))
+        if out.shape != (len(points),): raise ValueError("out must have the same length as points")
+
+        def predict_range(start):
+            out[start:start + self.block_size] = self.predict_block(points[start:start + self.block_size]) # reads one block of the input, each thread writes its own slice
+
+        parallel_map(predict_range, range(0, len(points), self.block_size), self.n_threads)
+        if isinstance(out, np.memmap): out.flush()
+        return out
+
+
+    def get_statistics(self):
+        """!
+        @brief Number of blocks processed and the mean number of centers compared per block.
+
+        """
+        return {"blocks": self.__n_blocks, "mean_candidates": self.__n_candidates / self.__n_blocks if self.__n_blocks else 0.0}
@@ -0,0 +1,160 @@
+import asyncio
+import collections
+import time
+
+import numpy as np
+
+from .predictor import PeriodicKMeansPredictor
+
+
+class MicroBatchingPredictor:
+    """!
+    @brief Asynchronous closest-center lookup for single points, coalescing concurrent requests into batches.
+
+    @details A background task takes the first queued request and collects more until max_batch_size requests are gathered or max_wait seconds have passed, then labels the whole batch with one call of PeriodicKMeansPredictor.predict. Use it from the event loop of the server.
+
+    """
+
+    def __init__(self, model, max_batch_size = 256, max_wait = 0.002, latency_window = 4096):
+        """!
+        @param[in] model (object): PeriodicKMeansPredictor, or a processed model providing get_centers() and period, e.g. PeriodicKMeans.
+        @param[in] max_batch_size (uint): Maximum number of points per batch.
+        @param[in] max_wait (double): Maximum time in seconds to wait for more requests after the first one of a batch.
+        @param[in] latency_window (uint): Number of most recent request latencies kept for the percentiles.
+
+        """
+        if max_batch_size <= 0: raise ValueError("max_batch_size must be positive")
+        if max_wait < 0: raise ValueError("max_wait must not be negative")
+        self.predictor = model if isinstance(model, PeriodicKMeansPredictor) else PeriodicKMeansPredictor.from_model(model)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.__queue = None
+        self.__task = None
+        self.__stopping = False
+        self.__latencies = collections.deque(maxlen = latency_window)
+        self.__n_requests = 0
+        self.__n_batches = 0
+        self.__total_latency = 0.0
+        self.__max_latency = 0.0
+        self.__busy_time = 0.0
+        self.__start_time = None
+
+
+    async def start(self):
+        """!
+        @brief Start the batching task in the running event loop.
+
+        """
+        if self.__task is not None: raise RuntimeError("The predictor is already started")
+        self.__queue = asyncio.Queue()
+        self.__stopping = False
+        self.__start_time = time.perf_counter()
+        self.__task = asyncio.get_running_loop().create_task(self.__serve())
+
+
+    async def stop(self):
+        """!
+        @brief Answer the requests already queued and stop the batching task.
+
+        @details Requests made once stop() is called are refused, any request still queued when the task ends is failed with RuntimeError.
+
+        """
+        if self.__task is None or self.__stopping: return
+        self.__stopping = True # no request is queued after the sentinel
+        await self.__queue.put(None)
+        try:
+            await self.__task
+        finally:
+            while not self.__queue.empty():
+                request = self.__queue.get_nowait()
+                if request is not None and not request[1].done(): request[1].set_exception(RuntimeError("The predictor was stopped"))
+            self.__task = None
+
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+    async def predict(self, point):
+        """!
+        @brief Index of the closest center to one point.
+
+        @param[in] point (array_like): Point of shape (D,).
+
+        @return (int) Index of the closest cluster.
+
+        """
+        if self.__task is None: raise RuntimeError("The predictor is not started, use start() or async with")
+        if self.__stopping: raise RuntimeError("The predictor is stopping")
+        point = np.asarray(point, dtype = np.float64).reshape(-1)
+        if point.shape != self.predictor.centers.shape[1:]: raise ValueError(f"point must have {self.predictor.centers.shape[1]} coordinates")
+        future = asyncio.get_running_loop().create_future()
+        await self.__queue.put((point, future, time.perf_counter()))
+        return await future
+
+
+    async def __serve(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            request = await self.__queue.get()
+            if request is None: break
+            batch = [request]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    request = self.__queue.get_nowait() if self.__queue.qsize() else await asyncio.wait_for(self.__queue.get(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    break
+                if request is None: # answer the batch, then stop
+                    stopping = True
+                    break
+                batch.append(request)
+            self.__answer(batch)
+
+
+    def __answer(self, batch):
+        batch_start = time.perf_counter()
+        try:
+            labels = self.predictor.predict(np.stack([point for point, _, _ in batch])).tolist()
+        except Exception as error:
+            for _, future, _ in batch:
+                if not future.done(): future.set_exception(error)
+            return
+        now = time.perf_counter()
+        self.__busy_time += now - batch_start
+        for (_, future, enqueued), label in zip(batch, labels):
+            if not future.done(): future.set_result(label) # the client may have been cancelled
+            latency = now - enqueued
+            self.__latencies.append(latency)
+            self.__total_latency += latency
+            self.__max_latency = max(self.__max_latency, latency)
+        self.__n_requests += len(batch)
+        self.__n_batches += 1
+
+
+    def get_statistics(self):
+        """!
+        @brief Counters of the answered requests.
+
+        @return (dict) Numbers of requests and batches, mean batch size, throughput in requests per second since start(), fraction of that time spent computing batches, and the mean, maximum, median and 99th percentile latencies in seconds (the percentiles over the latency_window most recent requests).
+
+        """
+        elapsed = time.perf_counter() - self.__start_time if self.__start_time is not None else 0.0
+        recent = np.array(self.__latencies)
+        return {
+            "requests": self.__n_requests,
+            "batches": self.__n_batches,
+            "mean_batch_size": self.__n_requests / self.__n_batches if self.__n_batches else 0.0,
+            "throughput": self.__n_requests / elapsed if elapsed > 0 else 0.0,
+            "utilization": self.__busy_time / elapsed if elapsed > 0 else 0.0,
+            "mean_latency": self.__total_latency / self.__n_requests if self.__n_requests else 0.0,
+            "max_latency": self.__max_latency,
+            "median_latency": float(np.median(recent)) if len(recent) else 0.0,
+            "p99_latency": float(np.quantile(recent, 0.99)) if len(recent) else 0.0,
+        }
@@ -0,0 +1,91 @@
+import numpy as np
+
+from .parallel import parallel_periodic_distance_square, parallel_periodic_manhattan_distance
+
+
+class PeriodicWorkspace:
+    """!
+    @brief Reusable buffers for the iterations of periodic k-means, sized once at fit time.
+
+    @details Holds the distance matrix, the per-thread scratch blocks, the labels, two alternating center arrays and the buffers of the unweighted periodic average, so that steady-state iterations only allocate the permutation grouping the points by cluster.
+
+    """
+
+    def __init__(self, n_points: int, n_clusters: int, dimension: int, n_threads: int = 1, block_size: int = 4096, dtype = np.float64):
+        self.shape = (n_points, n_clusters, dimension)
+        self.n_threads = n_threads
+        self.block_size = min(block_size, max(n_points, 1))
+        self.distances = np.empty((n_clusters, n_points), dtype = dtype)
+        self.scratch = [np.empty((n_clusters, self.block_size), dtype = dtype) for _ in range(n_threads)]
+        self.labels = np.empty(n_points, dtype = np.intp)
+        self.narrow_labels = np.empty(n_points, dtype = np.min_scalar_type(n_clusters)) # the labels in the smallest unsigned type, see PeriodicKMeans.get_labels()
+        self.__centers = [np.empty((n_clusters, dimension), dtype = dtype) for _ in range(2)]
+        self.__centers_index = 0
+        self.__values = np.empty(n_points, dtype = dtype) # gathered and sorted values of one cluster in one dimension
+        self.__work = [np.empty(n_points, dtype = dtype) for _ in range(3)]
+        self.__ranks = np.arange(1, n_points + 1, dtype = dtype) # cumulative counts of the sorted values, the same for every cluster
+
+
+    def fits(self, n_points: int, n_clusters: int, dimension: int):
+        return n_points == self.shape[0] and n_clusters <= self.shape[1] and dimension == self.shape[2]
+
+
+    def distances_square(self, centers: np.ndarray[float], points: np.ndarray[float], period):
+        """!
+        @brief Square periodic distances from each center to each point, written into the distance buffer.
+
+        @return (numpy.array) View of the buffer of shape (len(centers), N), valid until the next call.
+
+        """
+        out = self.distances[:len(centers)]
+        return parallel_periodic_distance_square(centers, points, period, n_threads = self.n_threads, out = out, block_size = self.block_size, scratch = self.scratch)
+
+
+    def distances_manhattan(self, centers: np.ndarray[float], points: np.ndarray[float], period):
+        """!
+        @brief Periodic Manhattan distances from each center to each point, written into the distance buffer as by distances_square().
+
+        """
+        out = self.distances[:len(centers)]
+        return parallel_periodic_manhattan_distance(centers, points, period, n_threads = self.n_threads, out = out, block_size = self.block_size, scratch = self.scratch)
+
+
+    def next_centers(self, n_clusters: int):
+        """!
+        @brief The center buffer not returned by the previous call, of shape (n_clusters, D).
+
+        """
+        self.__centers_index ^= 1
+        return self.__centers[self.__centers_index][:n_clusters]
+
+
+    def periodic_average(self, column: np.ndarray[float], indices: np.ndarray[int], period: float):
+        """!
+        @brief Unweighted periodic average of column[indices], the same criterion as periodic_average_1d evaluated in the workspace buffers.
+
+        """
+        n = len(indices)
+        values = self.__values[:n]
+        np.take(column, indices, out = values)
+        np.remainder(values, period, out = values)
+        values.sort()
+        sum_a = values.sum()
+        period_2 = period / 2
+        if values[-1] - values[0] <= period_2: return sum_a / n # trivial case
+        split = np.searchsorted(values, period_2) # elements below period/2 are moved up by a period in the second trial wrapping
+        if values[split - 1] + period - values[split] <= period_2: return ((sum_a + split * period) / n) % period
+        # general case, as in periodic_average_1d: try to shift elements 0 through i by a period forward, the sum of weights of the shifted elements is i + 1
+        ranks = self.__ranks[:n]
+        cumsum_a, new_averages, weighted_sums = (work[:n] for work in self.__work)
+        np.cumsum(values, out = cumsum_a)
+        np.multiply(ranks, period, out = new_averages)
+        new_averages += sum_a
+        new_averages /= n
+        np.multiply(ranks, period**2, out = weighted_sums)
+        cumsum_a *= 2 * period
+        weighted_sums += cumsum_a
+        weighted_sums += np.dot(values, values)
+        np.square(new_averages, out = cumsum_a)
+        cumsum_a *= n
+        weighted_sums -= cumsum_a # n times the variance of each shifted configuration
+        return new_averages[np.argmin(weighted_sums)] % period
@@ -0,0 +1,15 @@
+import numpy as np
+
+from periodic_kmeans import BisectingPeriodicKMeans
+
+
+def test_predict_matches_labels():
+    rng = np.random.default_rng(5)
+    data = (rng.normal(scale = 0.03, size = (2000, 2)) + rng.integers(8, size = (2000, 2)) / 8) % 1
+    model = BisectingPeriodicKMeans(data, period = 1, no_of_clusters = 12, random_state = 0).process()
+
+    _, children, leaf_labels = model.get_tree()
+    assert len(model.get_centers()) == 12
+    assert np.sum(children[:, 0] == -1) == 12 and np.sum(leaf_labels >= 0) == 12
+    np.testing.assert_array_equal(model.predict(data), model.get_labels())
+    assert sorted(set(model.get_labels().tolist())) == list(range(12))
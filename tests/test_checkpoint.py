@@ -0,0 +1,36 @@
+import numpy as np
+
+from periodic_kmeans import PeriodicKMeans
+
+
+def _data():
+    rng = np.random.default_rng(2)
+    return (rng.normal(scale = 0.08, size = (2000, 2)) + rng.integers(5, size = (2000, 1)) / 5) % 1
+
+
+def test_resume_matches_uninterrupted_fit(tmp_path):
+    data = _data()
+    initial_centers = data[:5]
+    expected = PeriodicKMeans(data, period = 1, initial_centers = initial_centers, tolerance = 0).process()
+
+    checkpoint = tmp_path / "fit.npz"
+    stopped = PeriodicKMeans(data, period = 1, initial_centers = initial_centers, tolerance = 0, itermax = 2, checkpoint = checkpoint).process()
+    assert stopped.get_fit_statistics()["iterations"] == 2
+    resumed = PeriodicKMeans.resume(checkpoint, data, tolerance = 0)
+
+    assert resumed.get_fit_statistics()["iterations"] == expected.get_fit_statistics()["iterations"]
+    np.testing.assert_array_equal(resumed.get_centers(), expected.get_centers())
+    np.testing.assert_array_equal(resumed.get_labels(), expected.get_labels())
+
+
+def test_exhausted_time_budget_leaves_a_valid_model():
+    data = _data()
+    model = PeriodicKMeans(data, period = 1, initial_centers = data[:5], tolerance = 0, time_budget = 1e-9).process()
+
+    statistics = model.get_fit_statistics()
+    assert statistics["time_budget_exhausted"] and not statistics["converged"]
+    assert statistics["iterations"] == 1 # the first iteration always runs
+    assert len(model.get_centers()) == 5 and len(model.get_labels()) == len(data)
+    assert sorted(np.concatenate(model.get_cluster_indices()).tolist()) == list(range(len(data)))
+    assert np.all((np.asarray(model.predict(data)) >= 0) & (np.asarray(model.predict(data)) < 5))
+    assert np.isfinite(model.get_total_wce())
@@ -0,0 +1,24 @@
+import numpy as np
+
+from periodic_kmeans import PeriodicCoresetStream, PeriodicKMeans, nearest_centers, periodic_coreset
+
+
+def _cost(data, centers, weights = None):
+    distances = nearest_centers(data, np.asarray(centers), period = 1)[1]
+    return np.sum(distances if weights is None else weights * distances)
+
+
+def test_coreset_fit_is_close_to_the_full_fit():
+    rng = np.random.default_rng(9)
+    data = (rng.integers(5, size = (20000, 1)) / 5 + rng.normal(scale = 0.03, size = (20000, 2))) % 1
+    initial_centers = [[0.05, 0.05], [0.25, 0.25], [0.45, 0.45], [0.65, 0.65], [0.85, 0.85]]
+    full = PeriodicKMeans(data, period = 1, initial_centers = initial_centers).process()
+    full_cost = _cost(data, full.get_centers())
+
+    stream = PeriodicCoresetStream(5, 500, period = 1, random_state = 0)
+    for chunk in np.array_split(data, 10): stream.add(chunk)
+    for points, weights in (periodic_coreset(data, 5, 1000, period = 1, random_state = 0), stream.get_coreset()):
+        np.testing.assert_allclose(weights.sum(), len(data))
+        np.testing.assert_allclose(_cost(points, full.get_centers(), weights), full_cost, rtol = 0.1) # the weighted cost estimates the full one
+        model = PeriodicKMeans(points, period = 1, initial_centers = initial_centers, weights = weights).process()
+        assert _cost(data, model.get_centers()) < 1.05 * full_cost
@@ -0,0 +1,18 @@
+import numpy as np
+
+from periodic_kmeans import DistributedPeriodicKMeans, InProcessBackend, PeriodicKMeans
+
+
+def test_distributed_matches_periodic_kmeans():
+    for seed in range(5):
+        rng = np.random.default_rng(seed)
+        data = (rng.normal(scale = 0.1, size = (300, 9)) + rng.integers(4, size = (300, 1)) / 4) % 1
+        initial_centers = data[:4]
+
+        model = PeriodicKMeans(data, period = 1, initial_centers = initial_centers)
+        model.process()
+        distributed = DistributedPeriodicKMeans(InProcessBackend([data[:100], data[100:]]), period = 1, initial_centers = initial_centers)
+        distributed.process()
+
+        np.testing.assert_allclose(distributed.get_centers(), model.get_centers())
+        np.testing.assert_allclose(distributed.get_total_wce(), model.get_total_wce())
@@ -0,0 +1,24 @@
+import numpy as np
+
+from periodic_kmeans import PeriodicKMeans
+
+
+def test_farthest_reseeds_with_the_farthest_point():
+    data = np.array([[0.0], [0.1], [0.2], [0.3], [0.7]])
+    model = PeriodicKMeans(data, period = 1, initial_centers = [[0.0], [0.7], [0.0]], empty_clusters = "farthest", itermax = 1) # the duplicate center gets no points
+    model.process()
+
+    assert [list(cluster) for cluster in model.get_clusters()] == [[0, 1, 2], [4], [3]] # 0.3 is the farthest from its center 0
+    np.testing.assert_allclose(model.get_centers()[2], [0.3])
+    assert model.get_fit_statistics()["reseeded_clusters"] == 1
+
+
+def test_farthest_keeps_all_clusters():
+    rng = np.random.default_rng(3)
+    data = (rng.normal(scale = 0.05, size = (500, 2)) + rng.integers(3, size = (500, 1)) / 3) % 1
+    initial_centers = np.concatenate((data[:3], data[:2])) # two duplicate centers
+    model = PeriodicKMeans(data, period = 1, initial_centers = initial_centers, empty_clusters = "farthest")
+    model.process()
+
+    assert len(model.get_centers()) == 5
+    assert all(len(cluster) > 0 for cluster in model.get_clusters())
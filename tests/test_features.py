@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from periodic_kmeans.features import extract_periodic_features, periodic_phases
+
+
+def test_timezone_aware_timestamps_use_local_time(tmp_path):
+    pytest.importorskip("pyarrow")
+    aware = pd.Series(pd.date_range("2021-03-14 03:00", periods = 50, freq = "37min", tz = "UTC")).dt.tz_convert("America/New_York") # across the change to daylight saving time
+    local = aware.dt.tz_localize(None)
+    expected = periodic_phases(local, ("day", "week", "month"))
+
+    np.testing.assert_allclose(periodic_phases(aware, ("day", "week", "month")), expected)
+    path = tmp_path / "pickups.parquet"
+    pd.DataFrame({"pickup": aware}).to_parquet(path)
+    np.testing.assert_allclose(extract_periodic_features(str(path), "pickup", ("day", "week", "month"), chunk_size = 16), expected)
@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+
+_CODE = """
+import sys, time
+start = time.perf_counter()
+import periodic_kmeans
+print(time.perf_counter() - start)
+print(",".join(name for name in ("jax", "pyclustering", "asyncio", "multiprocessing") if name in sys.modules))
+"""
+
+
+def test_import_is_light():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    elapsed, heavy = subprocess.run([sys.executable, "-c", _CODE], cwd = root, capture_output = True, text = True, check = True).stdout.split("\n")[:2]
+    assert heavy == "", f"importing periodic_kmeans imported {heavy}"
+    assert float(elapsed) < 2.0 # generous, the import takes a few tens of milliseconds
@@ -0,0 +1,36 @@
+import numpy as np
+
+from periodic_kmeans import PeriodicKMedians
+
+
+def test_weights_move_the_medians():
+    data = np.array([[0.1], [0.2], [0.6]])
+    initial_centers = [[0.2]]
+
+    unweighted = PeriodicKMedians(data, period = 1, initial_centers = initial_centers)
+    unweighted.process()
+    weighted = PeriodicKMedians(data, period = 1, initial_centers = initial_centers, weights = [1, 1, 10])
+    weighted.process()
+
+    np.testing.assert_allclose(unweighted.get_centers(), [[0.2]])
+    np.testing.assert_allclose(weighted.get_centers(), [[0.6]])
+
+
+def test_split_uses_the_manhattan_distance():
+    data = np.array([[0.0], [0.1], [0.2], [0.3], [0.7]])
+    model = PeriodicKMedians(data, period = 1, initial_centers = [[0.0], [0.7], [0.0]], empty_clusters = "split", itermax = 1)
+    model.process()
+
+    assert [list(cluster) for cluster in model.get_clusters()] == [[0, 1], [4], [2, 3]] # 0.1 is closer to the center 0 than to the farthest point 0.3
+
+
+def test_options_give_the_same_fit():
+    rng = np.random.default_rng(4)
+    data = (rng.normal(scale = 0.05, size = (3000, 9)) + rng.integers(3, size = (3000, 1)) / 3) % 1
+    initial_centers = data[:3]
+    expected = PeriodicKMedians(data, period = 1, initial_centers = initial_centers).process()
+
+    for options in ({"n_threads": 2}, {"workspace": True}, {"lean": True}, {"reproducible": True, "n_threads": 2}):
+        model = PeriodicKMedians(data, period = 1, initial_centers = initial_centers, **options).process()
+        np.testing.assert_array_equal(model.get_centers(), expected.get_centers())
+        np.testing.assert_array_equal(model.get_labels(), expected.get_labels())
@@ -0,0 +1,18 @@
+import numpy as np
+
+from periodic_kmeans import PeriodicKMeans
+
+
+def test_lean_matches_regular_fit_up_to_rounding():
+    rng = np.random.default_rng(1)
+    data = (rng.normal(scale = 0.05, size = (600, 12)) + rng.integers(3, size = (600, 1)) / 3) % 1 # 12 dimensions, summed pairwise by numpy
+    initial_centers = data[[0, 200, 400]]
+
+    regular = PeriodicKMeans(data, period = 1, initial_centers = initial_centers)
+    regular.process()
+    lean = PeriodicKMeans(data, period = 1, initial_centers = initial_centers, lean = True)
+    lean.process()
+
+    np.testing.assert_allclose(lean.get_centers(), regular.get_centers())
+    np.testing.assert_array_equal(lean.get_labels(), regular.get_labels())
+    np.testing.assert_allclose(lean.get_total_wce(), regular.get_total_wce())
@@ -0,0 +1,55 @@
+import numpy as np
+
+from periodic_kmeans import periodic_calinski_harabasz_score, periodic_davies_bouldin_score, periodic_silhouette_score
+
+
+def _blobs(rng, n_points, dimension, scale = 0.05):
+    labels = rng.integers(3, size = n_points)
+    return (labels[:, None] / 3 + rng.normal(scale = scale, size = (n_points, dimension))) % 1, labels
+
+
+def _direct_silhouette(data, labels, period):
+    difference = (data[:, None, :] - data[None, :, :] + period / 2) % period - period / 2
+    distances = np.sqrt(np.sum(difference**2, axis = -1))
+    scores = []
+    for index, label in enumerate(labels):
+        own = labels == label
+        if own.sum() == 1:
+            scores.append(0.0)
+            continue
+        a = distances[index, own].sum() / (own.sum() - 1)
+        b = min(distances[index, labels == other].mean() for other in np.unique(labels) if other != label)
+        scores.append((b - a) / max(a, b))
+    return np.mean(scores)
+
+
+def test_silhouette_sorted_and_pairwise_match_direct():
+    rng = np.random.default_rng(7)
+    data, labels = _blobs(rng, 400, 1, scale = 0.15)
+    expected = _direct_silhouette(data, labels, 1.0)
+    np.testing.assert_allclose(periodic_silhouette_score(data, labels, period = 1, method = "sorted"), expected)
+    np.testing.assert_allclose(periodic_silhouette_score(data, labels, period = 1, method = "pairwise", chunk_size = 64), expected)
+
+    data, labels = _blobs(rng, 300, 3, scale = 0.15)
+    np.testing.assert_allclose(periodic_silhouette_score(data, labels, period = 1, chunk_size = 64), _direct_silhouette(data, labels, 1.0))
+
+
+def test_davies_bouldin_and_calinski_harabasz_match_euclidean_away_from_the_boundary():
+    rng = np.random.default_rng(8)
+    labels = rng.integers(3, size = 500)
+    data = 0.35 + labels[:, None] * 0.1 + rng.normal(scale = 0.01, size = (500, 2)) # within half a period, the periodic distances are Euclidean
+    centers = np.array([data[labels == label].mean(axis = 0) for label in range(3)])
+
+    scatter = np.array([np.linalg.norm(data[labels == label] - centers[label], axis = 1).mean() for label in range(3)])
+    center_distances = np.linalg.norm(centers[:, None] - centers[None, :], axis = -1)
+    np.fill_diagonal(center_distances, np.inf)
+    expected_davies_bouldin = np.mean(np.max((scatter[:, None] + scatter[None, :]) / center_distances, axis = 1))
+    counts = np.bincount(labels)
+    between = np.sum(counts * np.sum((centers - data.mean(axis = 0))**2, axis = 1))
+    within = np.sum((data - centers[labels])**2)
+    expected_calinski_harabasz = between * (len(data) - 3) / (within * 2)
+
+    for shift in (0.0, 0.5): # also across the boundary
+        shifted = (data + shift) % 1
+        np.testing.assert_allclose(periodic_davies_bouldin_score(shifted, labels, period = 1), expected_davies_bouldin)
+        np.testing.assert_allclose(periodic_calinski_harabasz_score(shifted, labels, period = 1), expected_calinski_harabasz)
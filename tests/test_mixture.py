@@ -0,0 +1,19 @@
+import numpy as np
+
+from periodic_kmeans import PeriodicGaussianMixture
+
+
+def test_recovers_von_mises_components():
+    rng = np.random.default_rng(10)
+    means = np.array([[0.5, 6.0], [3.5, 2.0]])
+    concentrations = np.array([[20.0, 8.0], [10.0, 30.0]])
+    components = (rng.random(20000) < 0.7).astype(int) # 30% from the first component, 70% from the second
+    data = rng.vonmises(means[components], concentrations[components]) % (2 * np.pi)
+
+    model = PeriodicGaussianMixture(data, period = 2 * np.pi, initial_centers = [[1.0, 5.5], [3.0, 2.5]]).process()
+
+    difference = (np.asarray(model.get_centers()) - means + np.pi) % (2 * np.pi) - np.pi
+    np.testing.assert_allclose(difference, 0, atol = 0.05)
+    np.testing.assert_allclose(model.get_concentrations(), concentrations, rtol = 0.1)
+    np.testing.assert_allclose(model.get_mixture_weights(), [0.3, 0.7], atol = 0.02)
+    assert np.mean(model.predict(data) == components) > 0.95
@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+from periodic_kmeans import select_no_of_clusters
+
+
+@pytest.mark.parametrize("criterion", ["elbow", "silhouette", "gap"])
+@pytest.mark.parametrize("warm_start", [True, False])
+def test_selects_the_number_of_blobs(criterion, warm_start):
+    rng = np.random.default_rng(0)
+    blob_centers = np.array([[0.0, 0.0], [0.5, 0.0], [0.0, 0.5], [0.5, 0.5]]) # the first blob wraps around 0 in both dimensions
+    data = (blob_centers[rng.integers(4, size = 1200)] + rng.normal(scale = 0.03, size = (1200, 2))) % 1
+    result = select_no_of_clusters(data, range(2, 8), period = 1, criterion = criterion, warm_start = warm_start, sample_size = 600, random_state = 0)
+    assert result["best_no_of_clusters"] == 4
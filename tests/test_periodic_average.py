@@ -0,0 +1,38 @@
+import numpy as np
+
+from periodic_kmeans import batch_periodic_kmeans, periodic_average_1d, periodic_average_2d, periodic_average_segments
+
+
+def test_segments_match_1d():
+    rng = np.random.default_rng(0)
+    a = rng.uniform(0, 1, 300)
+    segments = rng.integers(0, 7, 300)
+    weights = rng.uniform(0, 1, 300)
+    averages = periodic_average_segments(a, segments, 8, weights = weights)
+    for segment in range(7):
+        mask = segments == segment
+        np.testing.assert_allclose(averages[segment], periodic_average_1d(a[mask], weights = weights[mask]))
+    assert np.isnan(averages[7])
+
+
+def test_segments_with_zero_weight():
+    a = np.array([0.0, 0.1, 0.1, 0.5, 0.6])
+    averages = periodic_average_segments(a, np.array([0, 0, 0, 1, 1]), weights = np.array([1.0, 1.0, 1.0, 0.0, 0.0]))
+    np.testing.assert_allclose(averages[0], periodic_average_1d(a[:3]))
+    assert np.isnan(averages[1])
+
+
+def test_batch_empty_input():
+    keys, centers, labels = batch_periodic_kmeans(np.empty((0, 2)), np.empty(0, dtype = int), 3)
+    assert keys.shape == (0,) and centers.shape == (0, 3, 2) and labels.shape == (0,)
+
+
+def test_binned_exact_matches_exact():
+    rng = np.random.default_rng(11)
+    for trial in range(50):
+        size = rng.integers(1, 2000)
+        a = rng.normal(rng.uniform(0, 360), rng.uniform(1, 120), size) # from tight to spread over the whole circle
+        weights = rng.uniform(0, 2, size) if trial % 2 else None
+        exact = periodic_average_1d(a, weights = weights, period = 360)
+        np.testing.assert_allclose(periodic_average_1d(a, weights = weights, period = 360, method = "binned-exact"), exact, rtol = 0, atol = 1e-9)
+    np.testing.assert_allclose(periodic_average_2d(a.reshape(-1, 1), period = 360, method = "binned-exact"), periodic_average_2d(a.reshape(-1, 1), period = 360), rtol = 0, atol = 1e-9)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from periodic_kmeans import PeriodicKMeans, PeriodicKMeansPredictor
+
+
+def test_save_load_without_extension(tmp_path):
+    rng = np.random.default_rng(0)
+    data = rng.uniform(0, 360, (500, 2))
+    model = PeriodicKMeans(data, period = 360, initial_centers = data[:3]).process()
+    model.save(tmp_path / "model")
+    assert (tmp_path / "model.npz").exists()
+    for predictor in (PeriodicKMeans.load(tmp_path / "model"), PeriodicKMeansPredictor.load(str(tmp_path / "model")), PeriodicKMeansPredictor.load(tmp_path / "model.npz")):
+        np.testing.assert_array_equal(predictor.centers, model.get_centers())
+        np.testing.assert_array_equal(predictor.predict(data), model.predict(data))
+
+
+def test_load_from_file_object(tmp_path):
+    predictor = PeriodicKMeansPredictor(np.array([[10.0, 20.0], [200.0, 300.0]]), period = 360)
+    predictor.save(tmp_path / "model.npz")
+    with open(tmp_path / "model.npz", "rb") as file:
+        loaded = PeriodicKMeansPredictor.load(file)
+    np.testing.assert_array_equal(loaded.centers, predictor.centers)
+    np.testing.assert_array_equal(loaded.period, predictor.period)
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from periodic_kmeans import DistributedPeriodicKMeans, InProcessBackend, PeriodicKMeans
+
+
+@pytest.mark.parametrize("dimension", [8, 9, 12])
+def test_reproducible_across_threads_shards_and_order(dimension):
+    for seed in range(5):
+        rng = np.random.default_rng(seed)
+        data = rng.integers(10, size = (300, dimension)) / 10 # coarse grid values, many points tie between centers
+        initial_centers = data[:4]
+
+        fits = []
+        for n_threads in (1, 2):
+            model = PeriodicKMeans(data, period = 1, initial_centers = initial_centers, n_threads = n_threads, reproducible = True)
+            model.process()
+            fits.append((model.get_centers(), model.get_total_wce()))
+        permuted = PeriodicKMeans(data[rng.permutation(len(data))], period = 1, initial_centers = initial_centers, reproducible = True)
+        permuted.process()
+        fits.append((permuted.get_centers(), permuted.get_total_wce()))
+        model = DistributedPeriodicKMeans(InProcessBackend([data[:100], data[100:]]), period = 1, initial_centers = initial_centers, reproducible = True)
+        model.process()
+        fits.append((model.get_centers(), model.get_total_wce()))
+
+        for centers, total_wce in fits[1:]:
+            np.testing.assert_array_equal(np.asarray(centers), np.asarray(fits[0][0]))
+            assert total_wce == fits[0][1]
@@ -0,0 +1,13 @@
+import numpy as np
+
+from periodic_kmeans import PeriodicKMeansPredictor, PrunedNearestCenters
+
+
+def test_pruned_labels_match_predict():
+    rng = np.random.default_rng(0)
+    points = np.cumsum(rng.normal(scale = 0.01, size = (5000, 10)), axis = 0) # a time series, nearby consecutive points
+    predictor = PeriodicKMeansPredictor(rng.random((40, 10)), period = 1)
+    scoring = PrunedNearestCenters(predictor, block_size = 128, n_threads = 2)
+
+    np.testing.assert_array_equal(scoring.predict(points), predictor.predict(points))
+    assert scoring.get_statistics()["mean_candidates"] < 40
@@ -0,0 +1,28 @@
+import asyncio
+
+import numpy as np
+
+from periodic_kmeans import MicroBatchingPredictor, PeriodicKMeansPredictor
+
+
+def test_predict_concurrent_with_stop():
+    predictor = MicroBatchingPredictor(PeriodicKMeansPredictor(np.array([[0.1], [0.6]]), period = 1), max_wait = 0.01)
+
+    async def request(point):
+        try:
+            return await predictor.predict([point])
+        except RuntimeError:
+            return None
+
+    async def main():
+        await predictor.start()
+        requests = [asyncio.ensure_future(request(point)) for point in np.linspace(0, 1, 200, endpoint = False)]
+        await asyncio.sleep(0)
+        stop = asyncio.ensure_future(predictor.stop())
+        requests += [asyncio.ensure_future(request(point)) for point in np.linspace(0, 1, 200, endpoint = False)]
+        return await asyncio.wait_for(asyncio.gather(stop, *requests), timeout = 10)
+
+    _, *labels = asyncio.run(main())
+    assert any(label is not None for label in labels)
+    assert all(label in (None, 0, 1) for label in labels)
+    assert labels[-1] is None # made after stop()
@@ -0,0 +1,15 @@
+import numpy as np
+
+from periodic_kmeans import PeriodicKMeans
+
+
+def test_workspace_after_dropped_cluster():
+    rng = np.random.default_rng(0)
+    data = np.concatenate((rng.normal(0.1, 0.02, (1500, 2)), rng.normal(0.6, 0.02, (1300, 2)))) % 1
+    initial_centers = [[0.1, 0.1], [0.6, 0.6], [0.1, 0.1]] # the duplicate center gets no points and is dropped
+    expected = PeriodicKMeans(data, period = 1, initial_centers = initial_centers).process()
+    model = PeriodicKMeans(data, period = 1, initial_centers = initial_centers, workspace = True).process()
+    assert len(model.get_centers()) == 2
+    np.testing.assert_allclose(model.get_centers(), expected.get_centers())
+    assert model.get_clusters() == expected.get_clusters()
+    np.testing.assert_array_equal(model.get_labels(), expected.get_labels())
@@ -1,5 +1,4 @@
 import bisect
-import datetime
 from enum import Enum
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -67,7 +66,7 @@ def k_means_clustering(data, n_clusters, period=None, metric=None):
 
 data_df = read_fco2_hq()
 
-data_df['yday'] = data_df.apply(lambda x: datetime.datetime(int(x['rok']),int(x['ms']),int(x['dz'])).timetuple().tm_yday, axis=1)
+data_df['yday'] = pd.to_datetime(pd.DataFrame({'year': data_df['rok'], 'month': data_df['ms'], 'day': data_df['dz']}).astype(int)).dt.dayofyear
 
 fout = open(outdir+"geo_results.tex", "w")
 
@@ -1,31 +1,22 @@
-import datetime as dt
-
 import pandas as pd
 import matplotlib.pyplot as plt
-days_in_month = [31,29,31,
-                 30,31,30,
-                 31,31,30,
-                 31,30,31]
-
-def convertDate(d):
-    return dt.datetime.fromisoformat(d)
 
-def normalize_month_time(month, month_time):
-    return month_time/days_in_month[month]
+from periodic_kmeans.features import periodic_phases
 
 basedir = "../../_data/in/nyc_taxi/"
 datafile = "test.csv"
 datafile = "train.csv"
 
-data_df = pd.read_csv(basedir+datafile);
+data_df = pd.read_csv(basedir+datafile, usecols=['pickup_datetime']);
 
 time_data = pd.DataFrame()
 
 time_data['spickup'] = data_df['pickup_datetime']
-time_data['pickup'] = pd.to_datetime(time_data['spickup'].apply(convertDate))
-time_data['day_time'] = [(x.hour+x.minute/60)/24 for x in time_data['pickup']]
-time_data['week_time'] = [x.isoweekday()+(x.hour+x.minute/60)/24 -1 for x in time_data['pickup']]
-time_data['month_time'] = [normalize_month_time(x.month-1,x.day+(x.hour+x.minute/60)/24 -1) for x in time_data['pickup']]
+time_data['pickup'] = pd.to_datetime(time_data['spickup'], format='ISO8601')
+phases = periodic_phases(time_data['pickup'], ('day', 'week', 'month'))
+time_data['day_time'] = phases[:, 0]
+time_data['week_time'] = phases[:, 1]*7
+time_data['month_time'] = phases[:, 2]
 print(time_data['pickup'][0], time_data['day_time'][0])
 print(time_data['pickup'][0], time_data['month_time'][0])
 print(time_data['pickup'][0].isoweekday(), time_data['week_time'][0])
@@ -49,5 +40,5 @@ plt.show()
 plt.hist(time_data['month_time'],bins=300)
 plt.title('Month time')
 plt.show()
-time_data.to_csv(basedir+'train_norm_data.csv')
+time_data.drop(columns=['spickup']).to_parquet(basedir+'train_norm_data.parquet')
 